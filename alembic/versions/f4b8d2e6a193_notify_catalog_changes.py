@@ -0,0 +1,115 @@
+"""notify catalog changes
+
+Revision ID: f4b8d2e6a193
+Revises: e3a7c1d5f829
+Create Date: 2026-10-18 16:07:12.538104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8d2e6a193'
+down_revision: Union[str, Sequence[str], None] = 'e3a7c1d5f829'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Новая версия каталога публикуется в канал инвалидации и доставляется
+    # после коммита изменяющей транзакции. Имя канала берется из
+    # app.invalidation_channel (приложение задает его при подключении из
+    # INVALIDATION__CHANNEL), иначе - канал по умолчанию. Команды, не
+    # затронувшие ни одной строки, версию не меняют: проверяются
+    # transition tables.
+    #
+    # Событие получает номер из общего счетчика change_feed (его же
+    # увеличивают изменения постов). Блокировка строки счетчика держится
+    # до коммита, поэтому номера идут без пропусков в порядке коммитов и
+    # одинаковы для всех воркеров.
+    op.execute("""
+        INSERT INTO catalog_versions (name, version)
+        VALUES ('change_feed', 0)
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        DECLARE
+            new_version BIGINT;
+            new_event_id BIGINT;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF NOT EXISTS (SELECT 1 FROM old_rows) THEN
+                    RETURN NULL;
+                END IF;
+            ELSIF TG_OP IN ('INSERT', 'UPDATE') THEN
+                IF NOT EXISTS (SELECT 1 FROM new_rows) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+
+            UPDATE catalog_versions SET version = version + 1
+            WHERE name = TG_TABLE_NAME
+            RETURNING version INTO new_version;
+            UPDATE catalog_versions SET version = version + 1
+            WHERE name = 'change_feed'
+            RETURNING version INTO new_event_id;
+            PERFORM pg_notify(
+                coalesce(nullif(current_setting('app.invalidation_channel',
+                                                true), ''),
+                         'cache_invalidation'),
+                json_build_object('event', 'catalog_changed',
+                                  'name', TG_TABLE_NAME,
+                                  'version', new_version,
+                                  'event_id', new_event_id)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Transition tables допускаются только у триггера на одно событие.
+    op.execute("DROP TRIGGER products_catalog_version ON products")
+    op.execute("""
+        CREATE TRIGGER products_catalog_version_insert
+        AFTER INSERT ON products REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER products_catalog_version_update
+        AFTER UPDATE ON products REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER products_catalog_version_delete
+        AFTER DELETE ON products REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER products_catalog_version_truncate
+        AFTER TRUNCATE ON products
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in ("insert", "update", "delete", "truncate"):
+        op.execute(f"DROP TRIGGER products_catalog_version_{event} "
+                   f"ON products")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE catalog_versions SET version = version + 1
+            WHERE name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER products_catalog_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON products
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+    """)
+    op.execute("DELETE FROM catalog_versions WHERE name = 'change_feed'")
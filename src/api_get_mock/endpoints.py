@@ -1,26 +1,41 @@
-from typing import Annotated, Dict
+from typing import Annotated, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header, \
     Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api_get_mock.schemas import Product, DeletePostResponse, UpdatePost, \
-    UpdatePostResponse
+from src.api_get_mock.schemas import ProductPage, ProductStats, \
+    ProductSearchResponse, PostSearchResponse, DeletePostResponse, \
+    UpdatePost, UpdatePostResponse, DeletePosts, UpdatePosts, \
+    PostsBatchResponse
 
 from src.api_get_mock.services import MockView
+from src.mockobjects.change_feed import POSTS, PRODUCTS
 
-from src.database.database import get_async_session
+from src.database.database import get_async_session, get_read_session
 
 router_mock_objects = APIRouter(tags=["Mock-View"])
 
 
 @router_mock_objects.get(
     "/get_product",operation_id="mock_list_product",
-    response_model=Dict[int, Product],
+    response_model=ProductPage,
     status_code=status.HTTP_200_OK,
     summary="Получить список продуктов",
     description="""
-        Эндпоинт для получения списка всех продуктов.
+        Эндпоинт для получения списка продуктов постранично.
+
+        ### Фильтры:
+        - category - категория
+        - min_price, max_price - диапазон цены включительно
+
+        ### Сортировка и пагинация:
+        - sort - id, price или -price (по убыванию цены)
+        - Для следующей страницы передайте next_cursor из ответа в cursor
+
+        ### Кэширование:
+        - Ответ содержит ETag; при совпадении If-None-Match возвращается 304
 
         ### Требуемые права:
         - **list_product** - право на просмотр списка продуктов
@@ -34,9 +49,21 @@ router_mock_objects = APIRouter(tags=["Mock-View"])
 
 )
 async def get_product(
-
+        category: str | None = Query(None, description="Категория"),
+        min_price: float | None = Query(
+            None, ge=0, description="Минимальная цена"),
+        max_price: float | None = Query(
+            None, ge=0, description="Максимальная цена"),
+        sort: Literal["id", "price", "-price"] = Query(
+            "id", description="Сортировка"),
+        limit: int | None = Query(
+            None, ge=1, description="Размер страницы"),
+        cursor: str | None = Query(
+            None, description="Курсор следующей страницы"),
+        if_none_match: Annotated[
+            str | None, Header(alias="If-None-Match")] = None,
         jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_read_session, scope="function")
 ):
     """
     Получение продуктов.
@@ -48,10 +75,173 @@ async def get_product(
 
         service = MockView()
         product = await service.handle_get_product(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            if_none_match=if_none_match,
             jwt_token=jwt_token,
             permissions_required=permissions_required,
             session=session)
         return product
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.get(
+    "/get_product/stats", operation_id="mock_product_stats",
+    response_model=ProductStats,
+    status_code=status.HTTP_200_OK,
+    summary="Статистика по продуктам",
+    description="""
+        Эндпоинт для агрегатов по продуктам: количество и минимальная,
+        средняя и максимальная цена по категориям, гистограмма цен.
+
+        ### Фильтры:
+        - category - категория
+        - min_price, max_price - диапазон цены включительно
+        - bins - число интервалов гистограммы
+
+        ### Требуемые права:
+        - **list_product** - право на просмотр списка продуктов
+        """
+)
+async def get_product_stats(
+        category: str | None = Query(None, description="Категория"),
+        min_price: float | None = Query(
+            None, ge=0, description="Минимальная цена"),
+        max_price: float | None = Query(
+            None, ge=0, description="Максимальная цена"),
+        bins: int = Query(10, ge=1, le=1000,
+                          description="Интервалов гистограммы"),
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_read_session, scope="function")
+):
+    """
+    Статистика по продуктам.
+    """
+
+    permissions_required = "list_product"
+
+    try:
+
+        service = MockView()
+        stats = await service.handle_get_product_stats(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            bins=bins,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return stats
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.get(
+    "/search/products", operation_id="mock_search_products",
+    response_model=ProductSearchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Поиск продуктов",
+    description="""
+        Эндпоинт поиска продуктов по названию и категории. Последнее
+        слово запроса ищется по префиксу, результаты упорядочены по
+        релевантности.
+
+        ### Требуемые права:
+        - **list_product** - право на просмотр списка продуктов
+        """
+)
+async def search_products(
+        query: str = Query(..., min_length=1, alias="q",
+                           description="Строка поиска"),
+        limit: int | None = Query(
+            None, ge=1, description="Количество результатов"),
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_read_session, scope="function")
+):
+    """
+    Поиск продуктов.
+    """
+
+    permissions_required = "list_product"
+
+    try:
+
+        service = MockView()
+        found = await service.handle_search_products(
+            query=query,
+            limit=limit,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return found
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.get(
+    "/search/posts", operation_id="mock_search_posts",
+    response_model=PostSearchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Поиск постов",
+    description="""
+        Эндпоинт поиска постов по заголовку и тексту. Последнее слово
+        запроса ищется по префиксу, результаты упорядочены по
+        релевантности.
+
+        ### Требуемые права:
+        - **update_post** - право на редактирование поста
+        """
+)
+async def search_posts(
+        query: str = Query(..., min_length=1, alias="q",
+                           description="Строка поиска"),
+        limit: int | None = Query(
+            None, ge=1, description="Количество результатов"),
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_read_session, scope="function")
+):
+    """
+    Поиск постов.
+    """
+
+    permissions_required = "update_post"
+
+    try:
+
+        service = MockView()
+        found = await service.handle_search_posts(
+            query=query,
+            limit=limit,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return found
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -67,6 +257,9 @@ async def get_product(
     description="""
             Эндпоинт для удаления поста по ID.
 
+            С заголовком If-Match (ETag вида "3" - версия поста) пост
+            удаляется, только если его версия не изменилась, иначе 412.
+
             ### Требуемые права:
             - **delete_post** - право на удаления поста
 
@@ -81,8 +274,9 @@ async def remove_post(
             description="ID поста для удаления",
             alias="id_post"
         ),
+        if_match: Annotated[str | None, Header(alias="If-Match")] = None,
         jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_async_session, scope="function")
 ):
     """
     Удаление постов.
@@ -95,10 +289,14 @@ async def remove_post(
         service = MockView()
         rem_post = await service.handle_remove_post(
             id_post=id_post,
+            if_match=if_match,
             jwt_token=jwt_token,
             permissions_required=permissions_required,
             session=session)
         return rem_post
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -114,6 +312,10 @@ async def remove_post(
     description="""
                 Эндпоинт для обновления поста по ID.
 
+                С заголовком If-Match (ETag вида "3" - версия поста) пост
+                изменяется, только если его версия не изменилась, иначе
+                412. Новая версия возвращается в edited_post.version.
+
                 ### Требуемые права:
                 - **update_post** - право на редактирование поста
 
@@ -130,8 +332,9 @@ async def update_post(
             description="ID поста для обновления",
             alias="id_post"
         ),
+        if_match: Annotated[str | None, Header(alias="If-Match")] = None,
         jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_async_session, scope="function")
 ):
     """
     Обновление постов.
@@ -145,10 +348,232 @@ async def update_post(
         update = await service.handle_edit_post(
             post_schema=post_schema,
             id_post=id_post,
+            if_match=if_match,
             jwt_token=jwt_token,
             permissions_required=permissions_required,
             session=session)
         return update
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.post(
+    "/delete_posts", operation_id="mock_delete_posts",
+    response_model=PostsBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Удалить несколько постов",
+    description="""
+            Эндпоинт для пакетного удаления постов. Права проверяются один
+            раз, все посты удаляются одним запросом. Для каждого поста
+            возвращается статус: ok, not_found или conflict (не совпала
+            переданная version).
+
+            ### Требуемые права:
+            - **delete_post** - право на удаления поста
+
+            ### Группы пользователей с доступом:
+            - admin
+            - moderator
+            """
+)
+async def remove_posts(
+        posts_schema: DeletePosts,
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_async_session, scope="function")
+):
+    """
+    Пакетное удаление постов.
+    """
+
+    permissions_required = "delete_post"
+
+    try:
+
+        service = MockView()
+        removed = await service.handle_remove_posts(
+            posts_schema=posts_schema,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return removed
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.patch(
+    "/update_posts", operation_id="mock_update_posts",
+    response_model=PostsBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Обновить несколько постов",
+    description="""
+                Эндпоинт для пакетного обновления постов. Права
+                проверяются один раз, все посты обновляются одним
+                запросом. Для каждого поста возвращается статус: ok,
+                not_found или conflict (не совпала переданная version).
+
+                ### Требуемые права:
+                - **update_post** - право на редактирование поста
+
+                ### Группы пользователей с доступом:
+                - admin
+                - moderator
+                - user
+                """
+)
+async def update_posts(
+        posts_schema: UpdatePosts,
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_async_session, scope="function")
+):
+    """
+    Пакетное обновление постов.
+    """
+
+    permissions_required = "update_post"
+
+    try:
+
+        service = MockView()
+        updated = await service.handle_edit_posts(
+            posts_schema=posts_schema,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return updated
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.get(
+    "/changes/posts", operation_id="mock_post_changes",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Поток изменений постов",
+    description="""
+        Server-Sent Events с изменениями постов вместо периодического
+        опроса.
+
+        ### События:
+        - event: posts, id - идентификатор события
+        - data: {"id": ID поста, "operation": "update" | "delete",
+          "version": версия}
+        - event: reset - продолжить с Last-Event-ID нельзя, данные нужно
+          перечитать
+
+        ### Переподключение:
+        - Передайте id последнего полученного события в заголовке
+          Last-Event-ID (EventSource делает это сам) или в last_event_id
+        - Отстающий клиент отключается и должен переподключиться
+
+        ### Требуемые права:
+        - **update_post** - право на редактирование поста
+        """
+)
+async def post_changes(
+        last_event_id_query: str | None = Query(
+            None, alias="last_event_id",
+            description="Id последнего полученного события"),
+        last_event_id: Annotated[
+            str | None, Header(alias="Last-Event-ID")] = None,
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_async_session, scope="function")
+):
+    """
+    Поток изменений постов.
+    """
+
+    permissions_required = "update_post"
+
+    try:
+
+        service = MockView()
+        stream = await service.handle_changes(
+            topic=POSTS,
+            last_event_id=last_event_id or last_event_id_query,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return stream
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_mock_objects.get(
+    "/changes/products", operation_id="mock_product_changes",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Поток изменений продуктов",
+    description="""
+        Server-Sent Events с изменениями продуктов вместо периодического
+        опроса.
+
+        ### События:
+        - event: products, id - идентификатор события
+        - data: {"operation": "update", "version": версия каталога}
+        - event: reset - продолжить с Last-Event-ID нельзя, данные нужно
+          перечитать
+
+        ### Переподключение:
+        - Передайте id последнего полученного события в заголовке
+          Last-Event-ID (EventSource делает это сам) или в last_event_id
+        - Отстающий клиент отключается и должен переподключиться
+
+        ### Требуемые права:
+        - **list_product** - право на просмотр списка продуктов
+        """
+)
+async def product_changes(
+        last_event_id_query: str | None = Query(
+            None, alias="last_event_id",
+            description="Id последнего полученного события"),
+        last_event_id: Annotated[
+            str | None, Header(alias="Last-Event-ID")] = None,
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_async_session, scope="function")
+):
+    """
+    Поток изменений продуктов.
+    """
+
+    permissions_required = "list_product"
+
+    try:
+
+        service = MockView()
+        stream = await service.handle_changes(
+            topic=PRODUCTS,
+            last_event_id=last_event_id or last_event_id_query,
+            jwt_token=jwt_token,
+            permissions_required=permissions_required,
+            session=session)
+        return stream
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -0,0 +1,79 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+CATALOG_RESPONSE_CACHE_SIZE = int(
+    os.getenv('CATALOG__RESPONSE_CACHE_SIZE', 1024))
+
+
+def make_etag(key: tuple, version: int) -> str:
+    """
+    Сильный ETag страницы: версия каталога и хэш параметров запроса.
+    """
+
+    digest = hashlib.blake2b(repr(key).encode('utf-8'),
+                             digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Сравнение с заголовком If-None-Match (слабое, как требует RFC 9110).
+    """
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Готовые JSON-ответы страниц каталога (LRU).
+
+    Ключ - параметры запроса. Запись действительна, пока не изменилась
+    версия каталога; устаревшая запись заменяется при следующем запросе.
+    """
+
+    def __init__(self, max_size: int = CATALOG_RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, tuple[int, bytes]] = OrderedDict()
+
+    def get(self, key: tuple, version: int) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple, version: int, body: bytes):
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (version, body)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+product_responses = ResponseCache()
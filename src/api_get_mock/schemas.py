@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Literal, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -11,6 +11,65 @@ class Product(BaseModel):
     category: str
 
 
+class ProductPage(BaseModel):
+    """
+    Схема страницы списка продуктов
+    """
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+
+class CategoryStats(BaseModel):
+    """
+    Схема агрегатов по категории
+    """
+    category: str
+    count: int
+    min_price: float
+    avg_price: float
+    max_price: float
+
+
+class PriceHistogram(BaseModel):
+    """
+    Схема гистограммы цен: границы интервалов и число продуктов в них
+    """
+    edges: List[float]
+    counts: List[int]
+
+
+class ProductStats(BaseModel):
+    """
+    Схема статистики по продуктам
+    """
+    count: int
+    categories: List[CategoryStats]
+    histogram: PriceHistogram
+
+
+class ProductSearchResponse(BaseModel):
+    """
+    Схема результатов поиска продуктов, по убыванию релевантности
+    """
+    items: List[Product]
+
+
+class Post(BaseModel):
+    """ Схема поста """
+    id: int
+    title: str
+    content: str
+    author: str
+    version: int
+
+
+class PostSearchResponse(BaseModel):
+    """
+    Схема результатов поиска постов, по убыванию релевантности
+    """
+    items: List[Post]
+
+
 class DeletePostResponse(BaseModel):
     """
     Схема ответа получения продуктов
@@ -24,7 +83,7 @@ class DeletePostResponse(BaseModel):
                 "message": "Пост успешно удален",
                 "deleted_post": {"id": 1, "title": "First Post",
                                  "content": "This is a sample post.",
-                                 "author": "user1"}
+                                 "author": "user1", "version": 1}
             }
         }
     )
@@ -54,7 +113,71 @@ class UpdatePostResponse(BaseModel):
                 "message": "Пост успешно отредактирован",
                 "edited_post": {"id": 1, "title": "First Post",
                                 "content": "This is a sample post.",
-                                "author": "user1"}
+                                "author": "user1", "version": 1}
+            }
+        }
+    )
+
+
+class PostDeleteItem(BaseModel):
+    """
+    Схема поста для пакетного удаления. version - ожидаемая версия
+    (как If-Match), без нее пост удаляется безусловно
+    """
+    id: int
+    version: Optional[int] = None
+
+
+class DeletePosts(BaseModel):
+    """
+    Схема пакетного удаления постов
+    """
+    items: List[PostDeleteItem]
+
+
+class PostPatch(UpdatePost):
+    """
+    Схема поста для пакетного редактирования
+    """
+    id: int
+    version: Optional[int] = None
+
+
+class UpdatePosts(BaseModel):
+    """
+    Схема пакетного редактирования постов
+    """
+    items: List[PostPatch]
+
+
+class PostBatchResult(BaseModel):
+    """
+    Схема результата по одному посту: ok, not_found или conflict (при
+    conflict в version текущая версия поста)
+    """
+    id: int
+    status: Literal["ok", "not_found", "conflict"]
+    post: Optional[Post] = None
+    version: Optional[int] = None
+
+
+class PostsBatchResponse(BaseModel):
+    """
+    Схема ответа пакетного изменения постов
+    """
+    results: List[PostBatchResult]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "results": [
+                    {"id": 1, "status": "ok",
+                     "post": {"id": 1, "title": "First Post",
+                              "content": "This is a sample post.",
+                              "author": "user1", "version": 2}},
+                    {"id": 2, "status": "conflict", "version": 3},
+                    {"id": 9, "status": "not_found"}
+                ]
             }
         }
     )
@@ -1,77 +1,251 @@
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from jose import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api_user_services.auth import protected_route
-from src.mockobjects.mock import products_db, posts_db
-from src.models.models import User
+from src.api_user_services.principal import Principal
+from src.api_get_mock.response_cache import product_responses, make_etag, \
+    etag_matches
+from src.api_get_mock.schemas import ProductPage
+from src.database.database_utils import commit_session
+from src.database.invalidation import invalidation_bus
+from src.mockobjects.catalog import query_products, product_stats, \
+    catalog_version, CATALOG_PAGE_SIZE, CATALOG_MAX_PAGE_SIZE
+from src.mockobjects.change_feed import publish_post_changes, \
+    iter_changes, change_feed, feed_position
+from src.mockobjects.post_store import update_post, delete_post, \
+    update_posts, delete_posts
+from src.mockobjects.search import search_products, search_posts, \
+    SEARCH_LIMIT, SEARCH_MAX_LIMIT
+
+
+def changed_posts(results: list) -> list:
+    return [result["post"] for result in results if result["status"] == "ok"]
 
 
 class MockView:
 
-    @protected_route
+    @protected_route(load_user=False)
     async def handle_get_product(self,
-
+                                 category: str | None,
+                                 min_price: float | None,
+                                 max_price: float | None,
+                                 sort: str,
+                                 limit: int | None,
+                                 cursor: str | None,
+                                 if_none_match: str | None,
                                  jwt_token: str,
-                                 authenticated_user: User,
+                                 authenticated_user: Principal,
                                  permissions_required: str,
                                  session: AsyncSession,
                                  *args, **kwargs):
+        """
+        Страница продуктов с фильтрами по категории и цене.
+
+        Ответ отдается готовыми байтами из кэша, пока не изменилась версия
+        каталога (один запрос по первичному ключу). Если ETag совпал с
+        If-None-Match - 304 без тела.
+        """
 
-        if not products_db:
-            raise HTTPException(
-                status_code=404,
-                detail="Продукты  не найдены"
-            )
+        limit = min(limit or CATALOG_PAGE_SIZE, CATALOG_MAX_PAGE_SIZE)
+        key = (category, min_price, max_price, sort, limit, cursor)
+        version = await catalog_version(session)
+        etag = make_etag(key, version)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        body = product_responses.get(key, version)
+        if body is None:
+            page = await query_products(session=session,
+                                        category=category,
+                                        min_price=min_price,
+                                        max_price=max_price,
+                                        sort=sort,
+                                        cursor=cursor,
+                                        limit=limit)
+            if not page["items"] and key[:3] == (None, None, None) \
+                    and not cursor:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Продукты  не найдены"
+                )
+            body = ProductPage.model_validate(page).model_dump_json().encode()
+            product_responses.put(key, version, body)
+
+        return Response(content=body, media_type="application/json",
+                        headers=headers)
+
+    @protected_route(load_user=False)
+    async def handle_get_product_stats(self,
+                                       category: str | None,
+                                       min_price: float | None,
+                                       max_price: float | None,
+                                       bins: int,
+                                       jwt_token: str,
+                                       authenticated_user: Principal,
+                                       permissions_required: str,
+                                       session: AsyncSession,
+                                       *args, **kwargs):
+        """
+        Количество и цены продуктов по категориям, гистограмма цен
+        """
 
-        product_data = products_db
-        return product_data
+        return await product_stats(session=session,
+                                   category=category,
+                                   min_price=min_price,
+                                   max_price=max_price,
+                                   bins=bins)
+
+    @protected_route(load_user=False)
+    async def handle_search_products(self,
+                                     query: str,
+                                     limit: int | None,
+                                     jwt_token: str,
+                                     authenticated_user: Principal,
+                                     permissions_required: str,
+                                     session: AsyncSession,
+                                     *args, **kwargs):
+        """
+        Поиск продуктов по названию и категории
+        """
 
-    @protected_route
+        limit = min(limit or SEARCH_LIMIT, SEARCH_MAX_LIMIT)
+        items = await search_products(session=session, text=query,
+                                      limit=limit)
+        return {"items": items}
+
+    @protected_route(load_user=False)
+    async def handle_search_posts(self,
+                                  query: str,
+                                  limit: int | None,
+                                  jwt_token: str,
+                                  authenticated_user: Principal,
+                                  permissions_required: str,
+                                  session: AsyncSession,
+                                  *args, **kwargs):
+        """
+        Поиск постов по заголовку и тексту
+        """
+
+        limit = min(limit or SEARCH_LIMIT, SEARCH_MAX_LIMIT)
+        items = await search_posts(session=session, text=query,
+                                   limit=limit)
+        return {"items": items}
+
+    @protected_route(load_user=False)
     async def handle_remove_post(self,
                                  id_post: int,
-                                 authenticated_user: User,
+                                 if_match: str | None,
+                                 authenticated_user: Principal,
                                  jwt_token: str,
                                  permissions_required: str,
                                  session: AsyncSession,
                                  *args, **kwargs):
         """
-        Удаление поста с проверкой прав
+        Удаление поста с проверкой прав и версии из If-Match
         """
 
-        if id_post not in posts_db:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Пост с ID {id_post} не найден"
-            )
-
-        deleted_post = posts_db.pop(id_post)
+        deleted_post = await delete_post(session=session, post_id=id_post,
+                                         if_match=if_match)
+        await publish_post_changes(session, "delete", [deleted_post])
+        await commit_session(session=session)
 
         return {
             "message": "Пост успешно удален",
             "deleted_post": deleted_post
         }
 
-    @protected_route
+    @protected_route(load_user=False)
     async def handle_edit_post(self,
                                id_post: int,
                                post_schema: str,
-                               authenticated_user: User,
+                               if_match: str | None,
+                               authenticated_user: Principal,
                                jwt_token: str,
                                permissions_required: str,
                                session: AsyncSession,
                                *args, **kwargs):
+        """
+        Редактирование поста с проверкой прав и версии из If-Match
+        """
 
-        if id_post not in posts_db:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Пост с ID {id_post} не найден"
-            )
-
-        edit_post = posts_db.get(id_post, None)
-
-        for field, name in post_schema:
-            if field in edit_post:
-                edit_post[field] = name
+        edit_post = await update_post(session=session, post_id=id_post,
+                                      changes=post_schema.model_dump(),
+                                      if_match=if_match)
+        await publish_post_changes(session, "update", [edit_post])
+        await commit_session(session=session)
 
         return {"message": "Пост успешно отредактирован",
                 "edited_post": edit_post}
+
+    @protected_route(load_user=False)
+    async def handle_remove_posts(self,
+                                  posts_schema: str,
+                                  authenticated_user: Principal,
+                                  jwt_token: str,
+                                  permissions_required: str,
+                                  session: AsyncSession,
+                                  *args, **kwargs):
+        """
+        Пакетное удаление постов: одна проверка прав, один DELETE
+        """
+
+        results = await delete_posts(session=session,
+                                     items=posts_schema.items)
+        await publish_post_changes(session, "delete", changed_posts(results))
+        await commit_session(session=session)
+
+        return {"results": results}
+
+    @protected_route(load_user=False)
+    async def handle_edit_posts(self,
+                                posts_schema: str,
+                                authenticated_user: Principal,
+                                jwt_token: str,
+                                permissions_required: str,
+                                session: AsyncSession,
+                                *args, **kwargs):
+        """
+        Пакетное редактирование постов: одна проверка прав, один UPDATE
+        """
+
+        results = await update_posts(session=session,
+                                     items=posts_schema.items)
+        await publish_post_changes(session, "update", changed_posts(results))
+        await commit_session(session=session)
+
+        return {"results": results}
+
+    @protected_route(load_user=False)
+    async def handle_changes(self,
+                             topic: str,
+                             last_event_id: str | None,
+                             jwt_token: str,
+                             authenticated_user: Principal,
+                             permissions_required: str,
+                             session: AsyncSession,
+                             *args, **kwargs):
+        """
+        Поток изменений темы в формате Server-Sent Events.
+
+        Права проверяются при подключении; сессия БД освобождается до
+        начала потока. Поток закрывается, когда токен истек или
+        пользователь деактивирован.
+        """
+
+        # Воркер, еще не получивший событий, берет точку отсчета из
+        # счетчика в основной БД, пока канал подключен.
+        if not change_feed.ready and invalidation_bus.connected:
+            change_feed.sync(await feed_position(session))
+
+        # Подпись токена уже проверена protected_route.
+        claims = jwt.get_unverified_claims(jwt_token)
+
+        return StreamingResponse(
+            iter_changes(topic, last_event_id, claims),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache",
+                     "X-Accel-Buffering": "no"})
@@ -0,0 +1,280 @@
+"""
+Массовый импорт пользователей из CSV/NDJSON через COPY.
+
+Запуск:
+    python -m src.api_user_management.bulk_import users.csv
+    python -m src.api_user_management.bulk_import users.ndjson --format ndjson
+
+Поля записи: email, first_name, last_name, patronymic, hashed_password
+(готовый bcrypt-хэш), role (имя роли, по умолчанию guest), is_active,
+registered_at (ISO 8601).
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Iterator
+
+from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.database import Session
+from src.database.database_utils import commit_session
+from src.load_permissions.snapshot import permission_registry
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT__BATCH_SIZE', 50000))
+# Сколько дубликатов и ошибок перечислять в отчете.
+IMPORT_REPORT_LIMIT = int(os.getenv('IMPORT__REPORT_LIMIT', 1000))
+
+BCRYPT_HASH = re.compile(r'^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$')
+NAME_MAX_LENGTH = 30
+COLUMNS = ("id", "first_name", "last_name", "patronymic", "email",
+           "hashed_password", "is_active", "registered_at", "role_id")
+
+
+class ImportReport:
+    """
+    Итоги импорта: добавлено, дубликаты, некорректные строки.
+    """
+
+    def __init__(self, limit: int = IMPORT_REPORT_LIMIT):
+        self.limit = limit
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.duplicate_emails: list[str] = []
+        self.errors: list[dict] = []
+
+    def add_duplicates(self, emails: Iterable[str]):
+        for email in emails:
+            self.duplicates += 1
+            if len(self.duplicate_emails) < self.limit:
+                self.duplicate_emails.append(email)
+
+    def add_error(self, line: int, error: str):
+        self.invalid += 1
+        if len(self.errors) < self.limit:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "duplicate_emails": self.duplicate_emails,
+            "errors": self.errors,
+        }
+
+
+def iter_raw_records(lines: Iterable[str],
+                     fmt: str) -> Iterator[tuple[int, dict | None, str]]:
+    """
+    Записи из CSV (с заголовком) или NDJSON: (номер строки, поля, ошибка).
+    """
+
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record, ""
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Некорректный JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Ожидается JSON-объект"
+            continue
+        yield line_number, record, ""
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value in (None, ""):
+        return True
+    normalized = str(value).strip().lower()
+    if normalized in ("true", "1", "yes"):
+        return True
+    if normalized in ("false", "0", "no"):
+        return False
+    raise ValueError(f"Некорректное значение is_active: {value}")
+
+
+def build_row(record: dict, role_ids, now: datetime) -> tuple:
+    """
+    Проверка записи и преобразование в кортеж колонок COLUMNS.
+    """
+
+    try:
+        email = validate_email(str(record.get("email") or ""),
+                               check_deliverability=False).normalized
+    except EmailNotValidError as e:
+        raise ValueError(f"Некорректный email: {e}")
+
+    names = []
+    for field in ("first_name", "last_name", "patronymic"):
+        value = str(record.get(field) or "").strip()
+        if not value or len(value) > NAME_MAX_LENGTH:
+            raise ValueError(f"Поле {field} пустое или длиннее "
+                             f"{NAME_MAX_LENGTH} символов")
+        names.append(value)
+
+    hashed_password = str(record.get("hashed_password") or "")
+    if not BCRYPT_HASH.match(hashed_password):
+        raise ValueError("hashed_password не является bcrypt-хэшем")
+
+    role_name = str(record.get("role") or "guest")
+    role_id = role_ids.get(role_name)
+    if role_id is None:
+        raise ValueError(f"Роли {role_name} не существует")
+
+    registered_at = now
+    if record.get("registered_at"):
+        try:
+            registered_at = datetime.fromisoformat(record["registered_at"])
+        except (TypeError, ValueError):
+            raise ValueError("Некорректная дата registered_at")
+        # Колонка без часового пояса: дата со смещением приводится к UTC.
+        if registered_at.tzinfo is not None:
+            registered_at = registered_at.astimezone(
+                timezone.utc).replace(tzinfo=None)
+
+    return (uuid.uuid4(), *names, email, hashed_password,
+            parse_bool(record.get("is_active")), registered_at, role_id)
+
+
+async def copy_batch(rows: list[tuple], session: AsyncSession) -> set[str]:
+    """
+    Загрузка пачки через COPY во временную таблицу и перенос в users.
+
+    Строки с уже существующим email (или id) пропускаются
+    ON CONFLICT DO NOTHING. Возвращает email добавленных пользователей.
+    """
+
+    await session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS users_import "
+        "(LIKE users INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"))
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        "users_import", records=rows, columns=COLUMNS)
+
+    columns = ", ".join(COLUMNS)
+    result = await session.execute(text(
+        f"INSERT INTO users ({columns}) SELECT {columns} FROM users_import "
+        f"ON CONFLICT DO NOTHING RETURNING email"))
+    inserted = set(result.scalars())
+
+    await commit_session(session=session)
+    return inserted
+
+
+def parse_batch(records: Iterator[tuple[int, dict | None, str]], role_ids,
+                now: datetime, report: ImportReport) -> list[tuple]:
+    """
+    Следующая пачка корректных строк, не больше IMPORT__BATCH_SIZE.
+    Некорректные строки попадают в отчет. Пустой список - записи
+    закончились.
+    """
+
+    batch = []
+    for line_number, record, error in records:
+        if record is None:
+            report.add_error(line_number, error)
+            continue
+        try:
+            batch.append(build_row(record, role_ids, now))
+        except (TypeError, ValueError) as e:
+            report.add_error(line_number, str(e))
+            continue
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            break
+    return batch
+
+
+async def import_users(lines: Iterable[str], fmt: str,
+                       session: AsyncSession) -> ImportReport:
+    """
+    Импорт пользователей пачками по IMPORT__BATCH_SIZE строк.
+
+    Некорректные строки и дубликаты попадают в отчет и не прерывают
+    загрузку. Чтение файла и проверка записей выполняются в отдельном
+    потоке, пачка за пачкой, и не блокируют event loop; в нем остается
+    только COPY.
+    """
+
+    # Имена ролей разрешаются в id один раз на весь импорт.
+    snapshot = await permission_registry.refresh(session)
+    role_ids = snapshot.role_ids
+
+    report = ImportReport()
+    now = datetime.now()
+    records = iter_raw_records(lines, fmt)
+
+    while True:
+        batch = await asyncio.to_thread(parse_batch, records, role_ids,
+                                        now, report)
+        if not batch:
+            break
+        await flush_batch(batch, report, session)
+
+    return report
+
+
+async def import_upload(file: BinaryIO, fmt: str,
+                        session: AsyncSession) -> ImportReport:
+    """
+    Импорт из загруженного файла (байты в UTF-8).
+    """
+
+    lines = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    return await import_users(lines=lines, fmt=fmt, session=session)
+
+
+async def flush_batch(batch: list[tuple], report: ImportReport,
+                      session: AsyncSession):
+    inserted = await copy_batch(batch, session)
+    report.inserted += len(inserted)
+
+    # Повтор email внутри пачки тоже считается дубликатом.
+    duplicates = []
+    for row in batch:
+        email = row[4]
+        if email in inserted:
+            inserted.discard(email)
+        else:
+            duplicates.append(email)
+    report.add_duplicates(duplicates)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("path", help="Путь к файлу CSV или NDJSON")
+    parser.add_argument("--format", choices=("csv", "ndjson"),
+                        help="Формат файла (по умолчанию по расширению)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    async with Session() as session:
+        with open(args.path, encoding="utf-8", newline="") as file:
+            report = await import_users(file, fmt, session)
+
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,16 @@
-from typing import Annotated, List, Union
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Union
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header, \
-    Query
+    Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api_user_management.schemes import UserWithRole, AddPermission
+from src.api_user_management.schemes import UserWithRole, AddPermission, \
+    ImportUsersResponse, UserPage
 from src.api_user_management.services import PermissionManager
 
-from src.database.database import get_async_session
+from src.database.database import get_async_session, get_read_session
 
 router_admin_permissions = APIRouter(tags=["Admin_Permissions"])
 
@@ -36,7 +39,7 @@ async def get_permission(
             alias="user_email"
         ),
         jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_read_session, scope="function")
 ):
     """
     Получение пользователей с их ролями и правами.
@@ -81,7 +84,7 @@ async def update_user_permissions(
             alias="user_email"
         ),
         jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_async_session, scope="function")
 ):
     try:
         service = PermissionManager()
@@ -97,3 +100,208 @@ async def update_user_permissions(
         await session.rollback()
         raise HTTPException(
             status_code=500, detail=f"Ошибка: {e}")
+
+
+@router_admin_permissions.get(
+    "/metrics", operation_id="admin_get_metrics",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Метрики сервиса",
+    description="""
+    Текущее состояние пула соединений с БД и внутренних кэшей.
+
+    ### Требования доступа:
+    - Только для администраторов с действительным JWT токеном
+
+    ### Возвращаемые данные:
+    - db_pool - занятые соединения, время ожидания соединения, переполнения
+    - token_cache - попадания и промахи кэша jwt-токенов
+    - hashing - очередь и время хеширования паролей
+    - rate_limit - счетчики ограничения частоты входа
+    """
+)
+async def get_metrics(
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_read_session, scope="function")
+):
+    """
+    Получение метрик сервиса.
+    """
+
+    try:
+        service = PermissionManager()
+        metrics = await service.handle_get_metrics(
+            jwt_token=jwt_token,
+            session=session)
+        return metrics
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_admin_permissions.post(
+    "/users/import", operation_id="admin_import_users",
+    response_model=ImportUsersResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Массовый импорт пользователей",
+    description="""
+    Загрузка пользователей из файла CSV или NDJSON.
+
+    ### Требования доступа:
+    - Только для администраторов с действительным JWT токеном
+
+    ### Поля записи:
+    - email, first_name, last_name, patronymic
+    - hashed_password - готовый bcrypt-хэш пароля
+    - role - имя роли (по умолчанию guest)
+    - is_active, registered_at - необязательные
+
+    ### Возвращаемые данные:
+    - Число добавленных пользователей, дубликатов и некорректных строк
+    - Дубликаты и ошибки не прерывают загрузку
+    """
+)
+async def import_users(
+        file: UploadFile = File(..., description="Файл CSV или NDJSON"),
+        file_format: Literal["csv", "ndjson"] = Query(
+            "csv",
+            description="Формат файла",
+            alias="format"
+        ),
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_async_session, scope="function")
+):
+    """
+    Импорт пользователей из файла.
+    """
+
+    try:
+        service = PermissionManager()
+        report = await service.handle_import_users(
+            file=file,
+            file_format=file_format,
+            jwt_token=jwt_token,
+            session=session)
+        return report
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_admin_permissions.get(
+    "/users", operation_id="admin_list_users",
+    response_model=UserPage,
+    status_code=status.HTTP_200_OK,
+    summary="Список пользователей с ролями и правами",
+    description="""
+    Постраничный список пользователей с фильтрами.
+
+    ### Требования доступа:
+    - Только для администраторов с действительным JWT токеном
+
+    ### Фильтры:
+    - role - имя роли
+    - is_active - активность учетной записи
+    - registered_from, registered_to - период регистрации
+
+    ### Пагинация:
+    - Пользователи упорядочены по дате регистрации
+    - Для следующей страницы передайте next_cursor из ответа в cursor
+    """
+)
+async def list_users(
+        role: str | None = Query(None, description="Имя роли"),
+        is_active: bool | None = Query(
+            None, description="Активность учетной записи"),
+        registered_from: datetime | None = Query(
+            None, description="Зарегистрирован не раньше"),
+        registered_to: datetime | None = Query(
+            None, description="Зарегистрирован раньше"),
+        limit: int | None = Query(
+            None, ge=1, description="Размер страницы"),
+        cursor: str | None = Query(
+            None, description="Курсор следующей страницы"),
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_read_session, scope="function")
+):
+    """
+    Получение страницы пользователей.
+    """
+
+    try:
+        service = PermissionManager()
+        page = await service.handle_list_users(
+            role=role,
+            is_active=is_active,
+            registered_from=registered_from,
+            registered_to=registered_to,
+            limit=limit,
+            cursor=cursor,
+            jwt_token=jwt_token,
+            session=session)
+        return page
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
+
+
+@router_admin_permissions.get(
+    "/users/export", operation_id="admin_export_users",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Выгрузка пользователей с ролями и правами",
+    description="""
+    Потоковая выгрузка всех пользователей в NDJSON или CSV.
+
+    ### Требования доступа:
+    - Только для администраторов с действительным JWT токеном
+
+    ### Возвращаемые данные:
+    - По строке на пользователя: данные профиля, роль и список прав
+    - Выгрузка читается из БД пачками, объем памяти не зависит от
+      числа пользователей
+    """
+)
+async def export_users(
+        file_format: Literal["ndjson", "csv"] = Query(
+            "ndjson",
+            description="Формат выгрузки",
+            alias="format"
+        ),
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
+        session: AsyncSession = Depends(get_read_session, scope="function")
+):
+    """
+    Выгрузка пользователей.
+    """
+
+    try:
+        service = PermissionManager()
+        export = await service.handle_export_users(
+            file_format=file_format,
+            jwt_token=jwt_token,
+            session=session)
+        return export
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Ошибка: {e}"
+        )
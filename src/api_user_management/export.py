@@ -0,0 +1,100 @@
+"""
+Потоковая выгрузка пользователей с ролями и правами в NDJSON/CSV.
+
+Запуск:
+    python -m src.api_user_management.export --format csv > users.csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from src.database.database import read_session_factory
+from src.load_permissions.snapshot import permission_registry
+from src.models.models import User
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT__CHUNK_SIZE', 1000))
+EXPORT_FIELDS = ("id", "email", "first_name", "last_name", "patronymic",
+                 "is_active", "registered_at", "role", "permissions")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_record(row, snapshot) -> dict:
+    return {
+        "id": str(row.id),
+        "email": row.email,
+        "first_name": row.first_name,
+        "last_name": row.last_name,
+        "patronymic": row.patronymic,
+        "is_active": row.is_active,
+        "registered_at": row.registered_at.isoformat()
+        if row.registered_at else None,
+        "role": snapshot.role_name(row.role_id),
+        "permissions": sorted(snapshot.permissions(row.role_id)),
+    }
+
+
+def format_chunk(rows, snapshot, fmt: str) -> str:
+    """
+    Пачка строк в NDJSON или CSV.
+    """
+
+    records = (export_record(row, snapshot) for row in rows)
+    if fmt == "ndjson":
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n"
+                       for record in records)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        record["permissions"] = ",".join(record["permissions"])
+        writer.writerow([record[field] for field in EXPORT_FIELDS])
+    return buffer.getvalue()
+
+
+async def iter_user_export(fmt: str) -> AsyncIterator[str]:
+    """
+    Выгрузка всех пользователей пачками через серверный курсор.
+
+    В памяти одновременно не больше EXPORT__CHUNK_SIZE строк. Следующая
+    пачка читается только после того, как потребитель забрал предыдущую,
+    поэтому медленный клиент замедляет чтение, а не копит данные.
+    """
+
+    async with read_session_factory()() as session:
+        snapshot = await permission_registry.refresh(session)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(EXPORT_FIELDS)
+            yield buffer.getvalue()
+
+        stmt = select(User.id, User.email, User.first_name, User.last_name,
+                      User.patronymic, User.is_active, User.registered_at,
+                      User.role_id).order_by(
+            User.registered_at, User.id).execution_options(
+            yield_per=EXPORT_CHUNK_SIZE)
+
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            yield format_chunk(rows, snapshot, fmt)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--format", choices=tuple(MEDIA_TYPES),
+                        default="ndjson", help="Формат выгрузки")
+    args = parser.parse_args()
+
+    async for chunk in iter_user_export(args.format):
+        sys.stdout.write(chunk)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
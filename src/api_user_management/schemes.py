@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -34,6 +34,14 @@ class UserWithRole(BaseModel):
     role: Role
 
 
+class UserPage(BaseModel):
+    """
+    Схема страницы списка пользователей
+    """
+    items: List[UserWithRole]
+    next_cursor: Optional[str] = None
+
+
 class AddPermission(BaseModel):
     """
     Схема изменения роли пользователя
@@ -41,3 +49,32 @@ class AddPermission(BaseModel):
     role: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportUsersResponse(BaseModel):
+    """
+    Схема ответа массового импорта пользователей
+    """
+    inserted: int
+    duplicates: int
+    invalid: int
+    duplicate_emails: List[str]
+    errors: List[ImportRowError]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "inserted": 99998,
+                "duplicates": 1,
+                "invalid": 1,
+                "duplicate_emails": ["ivan.ivanov@example.com"],
+                "errors": [{"line": 17,
+                            "error": "Роли superuser не существует"}]
+            }
+        }
+    )
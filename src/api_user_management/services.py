@@ -1,13 +1,84 @@
+import base64
+import binascii
+import csv
+import os
+import uuid
+from datetime import datetime, timezone
 from functools import wraps
 
-from fastapi import HTTPException
-from sqlalchemy import select
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
 
+from src.api_get_mock.response_cache import product_responses
+from src.api_user_management.bulk_import import import_upload
+from src.api_user_management.export import iter_user_export, MEDIA_TYPES
 from src.api_user_services.auth import protected_route
+from src.api_user_services.hashing import hashing_pool
+from src.api_user_services.principal import Principal, query_principal, \
+    user_with_role
+from src.api_user_services.rate_limit import auth_admission
+from src.api_user_services.revocation import revoked_users
+from src.api_user_services.token_cache import token_cache
+from src.database.database import pool_stats
 from src.database.database_utils import commit_session
-from src.models.models import User, Role
+from src.database.invalidation import invalidation_bus, USER_ROLE_CHANGED
+from src.database.write_behind import login_writes
+from src.load_permissions.snapshot import permission_registry
+from src.mockobjects.change_feed import change_feed
+from src.models.models import User, Permission, role_permission
+
+ADMIN_PAGE_SIZE = int(os.getenv('ADMIN__PAGE_SIZE', 50))
+ADMIN_MAX_PAGE_SIZE = int(os.getenv('ADMIN__MAX_PAGE_SIZE', 500))
+
+
+def encode_cursor(registered_at: datetime, user_id) -> str:
+    """
+    Курсор страницы: последняя пара (registered_at, id).
+    """
+
+    value = f"{registered_at.isoformat()}|{user_id}"
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        registered_at, user_id = value.split("|")
+        return datetime.fromisoformat(registered_at), uuid.UUID(user_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def naive_utc(value: datetime) -> datetime:
+    """
+    Дата для сравнения с users.registered_at (TIMESTAMP без зоны): дата с
+    часовым поясом приводится к UTC без зоны.
+    """
+
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def query_role_permissions(role_ids, session: AsyncSession) -> dict:
+    """
+    Права для набора ролей одним запросом: id роли -> список прав.
+    """
+
+    stmt = select(role_permission.c.role_id, Permission.id, Permission.name,
+                  Permission.code, Permission.description).join(
+        Permission, Permission.id == role_permission.c.permission_id
+    ).where(role_permission.c.role_id.in_(role_ids))
+    rows = await session.execute(stmt)
+
+    permissions = {role_id: [] for role_id in role_ids}
+    for role_id, perm_id, name, code, description in rows:
+        permissions[role_id].append({"id": perm_id, "name": name,
+                                     "code": code,
+                                     "description": description})
+    return permissions
 
 
 class PermissionManager:
@@ -15,7 +86,7 @@ class PermissionManager:
     @protected_route
     async def handle_user_permissions(self, email: str,
                                       jwt_token: str,
-                                      authenticated_user: User,
+                                      authenticated_user: Principal,
                                       session: AsyncSession,
                                       *args, **kwargs):
 
@@ -23,7 +94,7 @@ class PermissionManager:
         Получение прав пользователей
         """
 
-        if authenticated_user.role.name != "admin":
+        if authenticated_user.role_name != "admin":
             raise HTTPException(status_code=403,
                                 detail="Ресурс не доступен")
 
@@ -32,28 +103,21 @@ class PermissionManager:
                 status_code=400,
                 detail="Необходимо указать email.")
 
-        if authenticated_user.role.name != "admin":
-            raise HTTPException(status_code=403,
-                                detail="Ресурс не доступен")
-
-        stmt = select(User).where(User.email == email).options(
-            selectinload(User.role).options(selectinload(Role.permissions)))
-
-        user_exist = await session.scalars(stmt)
-        user = user_exist.first()
+        # Пользователь, роль и права одним запросом.
+        user = await query_principal(email=email, session=session)
         if not user:
             raise HTTPException(
                 status_code=404,
                 detail=f"Пользователь с email {email} не найден")
 
-        return user
+        return user_with_role(user)
 
     @protected_route
     async def handle_update_permissions(self,
                                         user_schema: str,
                                         email: str,
                                         jwt_token: str,
-                                        authenticated_user: User,
+                                        authenticated_user: Principal,
                                         session: AsyncSession,
                                         *args, **kwargs):
 
@@ -61,7 +125,7 @@ class PermissionManager:
         Обновление прав пользователя
         """
 
-        if authenticated_user.role.name != "admin":
+        if authenticated_user.role_name != "admin":
             raise HTTPException(status_code=403,
                                 detail="Ресурс не доступен")
 
@@ -70,31 +134,192 @@ class PermissionManager:
                 status_code=400,
                 detail="Необходимо указать email.")
 
-        stmt = select(User).where(User.email == email).options(
-            joinedload(User.role).options(joinedload(Role.permissions)))
+        new_role = user_schema.role
 
-        user_exist = await session.scalars(stmt)
-        user = user_exist.first()
+        # Роль ищется в снимке прав, неизвестная роль перечитывает снимок.
+        role_id = permission_registry.snapshot.role_id(new_role)
+        if role_id is None:
+            snapshot = await permission_registry.refresh(session)
+            role_id = snapshot.role_id(new_role)
 
-        if not user:
+        if role_id is None:
+            raise HTTPException(status_code=404,
+                                detail=f"Роли {user_schema.role} не существует")
+
+        stmt = update(User).where(User.email == email).values(
+            role_id=role_id).returning(User.id)
+        updated = await session.execute(stmt)
+
+        updated_user = updated.first()
+        if not updated_user:
             raise HTTPException(
                 status_code=404,
                 detail=f"Пользователь с email {email} не найден")
 
-        new_role = user_schema.role
+        await invalidation_bus.publish(session, USER_ROLE_CHANGED,
+                                       user_id=updated_user.id,
+                                       role_id=role_id)
+        await commit_session(session=session)
 
-        stmt = select(Role).where(Role.name == new_role)
-        exist_role = await session.scalars(stmt)
-        role = exist_role.first()
+        user = await query_principal(email=email, session=session)
 
-        if not role:
-            raise HTTPException(status_code=404,
-                                detail=f"Роли {user_schema.role} не существует")
+        return user_with_role(user)
 
-        user.role_id = role.id
+    @protected_route
+    async def handle_get_metrics(self,
+                                 jwt_token: str,
+                                 authenticated_user: Principal,
+                                 session: AsyncSession,
+                                 *args, **kwargs):
 
-        await commit_session(session=session)
+        """
+        Метрики пула соединений, кэшей, хеширования, лимитов, канала
+        инвалидации и потока изменений
+        """
+
+        if authenticated_user.role_name != "admin":
+            raise HTTPException(status_code=403,
+                                detail="Ресурс не доступен")
+
+        return {
+            "db_pool": pool_stats(),
+            "token_cache": token_cache.stats(),
+            "hashing": hashing_pool.stats(),
+            "rate_limit": auth_admission.stats(),
+            "login_writes": login_writes.stats(),
+            "invalidation": invalidation_bus.stats(),
+            "revoked_users": revoked_users.stats(),
+            "product_responses": product_responses.stats(),
+            "change_feed": change_feed.stats(),
+        }
 
-        await session.refresh(user)
+    @protected_route
+    async def handle_import_users(self,
+                                  file: UploadFile,
+                                  file_format: str,
+                                  jwt_token: str,
+                                  authenticated_user: Principal,
+                                  session: AsyncSession,
+                                  *args, **kwargs):
+
+        """
+        Массовый импорт пользователей
+        """
+
+        if authenticated_user.role_name != "admin":
+            raise HTTPException(status_code=403,
+                                detail="Ресурс не доступен")
+
+        try:
+            report = await import_upload(file=file.file, fmt=file_format,
+                                         session=session)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400,
+                                detail=f"Некорректный файл: {e}")
+
+        return report.to_dict()
+
+    @protected_route
+    async def handle_list_users(self,
+                                role: str | None,
+                                is_active: bool | None,
+                                registered_from: datetime | None,
+                                registered_to: datetime | None,
+                                limit: int | None,
+                                cursor: str | None,
+                                jwt_token: str,
+                                authenticated_user: Principal,
+                                session: AsyncSession,
+                                *args, **kwargs):
+
+        """
+        Постраничный список пользователей с ролями и правами
+        """
+
+        if authenticated_user.role_name != "admin":
+            raise HTTPException(status_code=403,
+                                detail="Ресурс не доступен")
+
+        limit = min(limit or ADMIN_PAGE_SIZE, ADMIN_MAX_PAGE_SIZE)
+
+        stmt = select(User.id, User.email, User.first_name, User.last_name,
+                      User.patronymic, User.hashed_password, User.is_active,
+                      User.registered_at, User.role_id)
+
+        if role:
+            role_id = permission_registry.snapshot.role_id(role)
+            if role_id is None:
+                snapshot = await permission_registry.refresh(session)
+                role_id = snapshot.role_id(role)
+            if role_id is None:
+                raise HTTPException(status_code=404,
+                                    detail=f"Роли {role} не существует")
+            stmt = stmt.where(User.role_id == role_id)
+
+        if is_active is not None:
+            stmt = stmt.where(User.is_active == is_active)
+        if registered_from:
+            stmt = stmt.where(
+                User.registered_at >= naive_utc(registered_from))
+        if registered_to:
+            stmt = stmt.where(User.registered_at < naive_utc(registered_to))
+
+        # Keyset-пагинация: продолжение после последней строки страницы,
+        # без OFFSET.
+        if cursor:
+            stmt = stmt.where(tuple_(User.registered_at, User.id) >
+                              tuple_(*decode_cursor(cursor)))
+
+        stmt = stmt.order_by(User.registered_at, User.id).limit(limit + 1)
+        rows = (await session.execute(stmt)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].registered_at, rows[-1].id)
+
+        # Права запрашиваются один раз на каждую роль страницы.
+        role_ids = {row.role_id for row in rows}
+        permissions = await query_role_permissions(role_ids, session)
+        snapshot = permission_registry.snapshot
+
+        items = [{
+            "id": row.id,
+            "email": row.email,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "patronymic": row.patronymic,
+            "hashed_password": row.hashed_password,
+            "is_active": row.is_active,
+            "registered_at": row.registered_at,
+            "role_id": row.role_id,
+            "role": {
+                "id": row.role_id,
+                "name": snapshot.role_name(row.role_id),
+                "permissions": permissions[row.role_id],
+            },
+        } for row in rows]
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    @protected_route
+    async def handle_export_users(self,
+                                  file_format: str,
+                                  jwt_token: str,
+                                  authenticated_user: Principal,
+                                  session: AsyncSession,
+                                  *args, **kwargs):
+
+        """
+        Потоковая выгрузка пользователей с ролями и правами
+        """
+
+        if authenticated_user.role_name != "admin":
+            raise HTTPException(status_code=403,
+                                detail="Ресурс не доступен")
 
-        return user
+        return StreamingResponse(
+            iter_user_export(file_format),
+            media_type=MEDIA_TYPES[file_format],
+            headers={"Content-Disposition":
+                     f'attachment; filename="users.{file_format}"'})
@@ -1,16 +1,24 @@
 import os
+import uuid
 from functools import wraps
 
 from jose import jwt, ExpiredSignatureError
 from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from src.api_user_services.principal import Principal
+from src.api_user_services.revocation import revoked_users
+from src.api_user_services.token_cache import token_cache
+from src.database.database import current_client
+from src.load_permissions.snapshot import permission_registry
 from src.models.models import User, Role
 
 JWT_SECRET = os.getenv('JWT__SECRET')
 JWT_ALGORITHM = os.getenv('JWT__ALGORITHM')
+# Режим авторизации без БД по битовой маске прав в токене.
+JWT_EMBED_PERMISSIONS = os.getenv(
+    'JWT__EMBED_PERMISSIONS', 'false').lower() == 'true'
 
 
 async def query_user_by_email(email: str, session: AsyncSession) -> User:
@@ -18,23 +26,23 @@ async def query_user_by_email(email: str, session: AsyncSession) -> User:
     Получение пользователя по email с проверкой активации.
     """
 
-    stmt = select(User).where(User.email == email).options(
-        selectinload(User.role))
+    stmt = select(User).where(User.email == email)
     user_exists = await session.scalars(stmt)
     user = user_exists.first()
     return user
 
 
 async def validation_user(user_id: str, user_email: str,
-                          session: AsyncSession):
+                          session: AsyncSession) -> Principal:
     """
     Проверка есть ли пользователь с переданным токеном.
     """
 
-    stmt = select(User).where(User.email == user_email,
-                              User.id == user_id).options(
-        selectinload(User.role).options(selectinload(Role.permissions)))
-    user_exist = await  session.scalars(stmt)
+    # Роль и права берутся из снимка permission_registry.
+    stmt = select(User.id, User.email, User.is_active,
+                  User.role_id).where(User.email == user_email,
+                                      User.id == user_id)
+    user_exist = await session.execute(stmt)
     user = user_exist.first()
     if not user:
         raise HTTPException(status_code=401,
@@ -42,7 +50,8 @@ async def validation_user(user_id: str, user_email: str,
     if not user.is_active:
         raise HTTPException(status_code=401, detail="Учетная запись неактивна")
 
-    return user
+    snapshot = await permission_registry.resolve(user.role_id, session)
+    return Principal.from_row(user, snapshot)
 
 
 async def validation_role(role: str, session: AsyncSession):
@@ -60,11 +69,58 @@ async def validation_role(role: str, session: AsyncSession):
     return role
 
 
-def protected_route(func):
+def permission_claims(role_id, snapshot) -> dict:
+    """
+    Поля jwt-токена с ролью и битовой маской прав.
+    """
+
+    return {
+        'rid': str(role_id),
+        'pmask': snapshot.mask(role_id),
+        'pver': snapshot.version,
+    }
+
+
+def authorize_by_claims(payload: dict,
+                        permissions_required: str) -> Principal | None:
+    """
+    Проверка права по маске из токена без обращения к БД.
+
+    Возвращает None, если токен без маски, версия прав устарела или
+    пользователь после выдачи токена деактивирован либо сменил роль -
+    тогда выполняется обычная проверка через БД.
+    """
+
+    snapshot = permission_registry.snapshot
+    if payload.get("pver") != snapshot.version:
+        return None
+    if revoked_users.is_stale(payload.get("sub"), payload.get("iat", 0)):
+        return None
+
+    if not payload.get("pmask", 0) & snapshot.bit(permissions_required):
+        raise HTTPException(status_code=403,
+                            detail="Ресурс не доступен")
+
+    role_id = uuid.UUID(payload["rid"])
+    return Principal(uuid.UUID(payload["sub"]), payload.get("email"),
+                     role_id, snapshot.role_name(role_id),
+                     snapshot.permissions(role_id))
+
+
+def protected_route(func=None, *, load_user: bool = True):
     """
     Аутентификация пользователя по jwt-token.
+
+    Обработчик получает authenticated_user типа Principal. При
+    load_user=False и включенном JWT__EMBED_PERMISSIONS право проверяется
+    по маске из токена, а Principal строится из его полей без БД.
+    Деактивация и смена роли доходят до всех воркеров событием
+    invalidation_bus, после чего токен пользователя проверяется через БД.
     """
 
+    if func is None:
+        return lambda f: protected_route(f, load_user=load_user)
+
     @wraps(func)
     async def wrapper(self, *args, **kwargs):
 
@@ -76,13 +132,25 @@ def protected_route(func):
         if not jwt_token:
             raise HTTPException(status_code=401,
                                 detail="Вы не авторизованы")
-        try:
-            payload = jwt.decode(jwt_token, JWT_SECRET,
-                                 algorithms=[JWT_ALGORITHM])
-
-        except ExpiredSignatureError:
-            raise HTTPException(status_code=401,
-                                detail="Срок действия токена истек")
+        # Повторные запросы с тем же токеном не декодируются заново.
+        payload = token_cache.get(jwt_token)
+        if payload is None:
+            try:
+                payload = jwt.decode(jwt_token, JWT_SECRET,
+                                     algorithms=[JWT_ALGORITHM])
+
+            except ExpiredSignatureError:
+                raise HTTPException(status_code=401,
+                                    detail="Срок действия токена истек")
+            token_cache.put(jwt_token, payload)
+        # Записи этого запроса учитываются для read-your-writes клиента.
+        current_client.set(jwt_token)
+
+        if not load_user and JWT_EMBED_PERMISSIONS and permissions_required:
+            principal = authorize_by_claims(payload, permissions_required)
+            if principal:
+                return await func(self, authenticated_user=principal,
+                                  *args, **kwargs)
 
         user_id = payload.get("sub", None)
         user_email = payload.get("email", None)
@@ -92,15 +160,9 @@ def protected_route(func):
                                      user_email=user_email,
                                      session=session)
 
-        # Роль пользователя
-        user_role = user.role.name
-        # Список прав пользователя
-        list_permissions = [permission.code for permission in
-                            user.role.permissions]
-
         if permissions_required:
 
-            if permissions_required not in list_permissions:
+            if permissions_required not in user.permissions:
                 raise HTTPException(status_code=403,
                                     detail="Ресурс не доступен")
 
@@ -0,0 +1,60 @@
+"""
+Подбор стоимости bcrypt под целевое время проверки пароля.
+
+Запуск:
+    python -m src.api_user_services.calibrate --target-ms 250
+"""
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+
+
+def measure_verify(rounds: int, samples: int) -> float:
+    """
+    Медианное время checkpw в миллисекундах для заданной стоимости.
+    """
+
+    password = b"calibration-password-1"
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int) -> int:
+    """
+    Наибольшая стоимость, при которой проверка укладывается в target_ms.
+    """
+
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure_verify(rounds, samples)
+        print(f"rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--target-ms", type=float, default=250,
+                        help="Целевое время проверки пароля, мс")
+    parser.add_argument("--samples", type=int, default=3,
+                        help="Число замеров на каждую стоимость")
+    args = parser.parse_args()
+
+    rounds = calibrate(target_ms=args.target_ms, samples=args.samples)
+    print(f"HASHING__BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, \
+    Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api_user_services.schemes import UserCreate, UserCreateResponse, \
     UserLogin, UserLoginResponse, UpdateUser, UpdateUserResponse, \
     LogoutUserResponse
+from src.api_user_services.rate_limit import client_ip
 from src.api_user_services.services import AuthService
 from src.database.database import get_async_session
 
@@ -34,7 +36,8 @@ router_user = APIRouter(tags=["Auth_Users"])
 )
 async def create_user(
         user: UserCreate,
-        session: AsyncSession = Depends(get_async_session)):
+        request: Request,
+        session: AsyncSession = Depends(get_async_session, scope="function")):
     """
     Регистрация пользователя.
     """
@@ -43,9 +46,13 @@ async def create_user(
         service = AuthService()
         request_register_user = await service.handle_create_user(
             user_schema=user,
+            client_ip=client_ip(request),
             session=session,
         )
         return request_register_user
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -73,7 +80,8 @@ async def create_user(
 )
 async def login_user(
         user: UserLogin,
-        session: AsyncSession = Depends(get_async_session)
+        request: Request,
+        session: AsyncSession = Depends(get_async_session, scope="function")
 ):
     """
     Вход в аккаунт пользователя
@@ -81,9 +89,14 @@ async def login_user(
 
     try:
         service = AuthService()
-        login = await service.handle_user_login(user_schema=user,
-                                                session=session)
+        login = await service.handle_user_login(
+            user_schema=user,
+            client_ip=client_ip(request),
+            session=session)
         return login
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -112,7 +125,7 @@ async def update_user(user: UpdateUser,
                       jwt_token: Annotated[
                           str | None, Header(alias="Jwt-Token")] = None,
 
-                      session: AsyncSession = Depends(get_async_session)):
+                      session: AsyncSession = Depends(get_async_session, scope="function")):
     """
     Редактирование профиля пользователя
     """
@@ -125,6 +138,9 @@ async def update_user(user: UpdateUser,
             session=session
         )
         return editing_profile
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
 
         await session.rollback()
@@ -150,7 +166,7 @@ async def update_user(user: UpdateUser,
                   )
 async def logout_user(
         jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None,
-        session: AsyncSession = Depends(get_async_session)):
+        session: AsyncSession = Depends(get_async_session, scope="function")):
     """
      Эндпойнт выхода пользователя из системы
      """
@@ -161,6 +177,9 @@ async def logout_user(
             jwt_token=jwt_token,
             session=session)
         return logout
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
 
         await session.rollback()
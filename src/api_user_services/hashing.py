@@ -1,20 +1,127 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import bcrypt
+from fastapi import HTTPException
+
+HASHING_POOL_SIZE = int(os.getenv('HASHING__POOL_SIZE', os.cpu_count() or 1))
+HASHING_QUEUE_SIZE = int(os.getenv('HASHING__QUEUE_SIZE', 64))
+# Стоимость bcrypt (log2 числа раундов), подбирается командой
+# python -m src.api_user_services.calibrate
+BCRYPT_ROUNDS = int(os.getenv('HASHING__BCRYPT_ROUNDS', 12))
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started, time.perf_counter()
+
+
+class HashingPool:
+    """
+    Пул потоков для bcrypt с ограниченной очередью.
+
+    bcrypt отпускает GIL на время вычисления, поэтому потоки выполняют
+    хеширование параллельно и не блокируют event loop.
+    """
+
+    def __init__(self, workers: int = HASHING_POOL_SIZE,
+                 queue_size: int = HASHING_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="bcrypt")
+        # Задачи в очереди и в работе.
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.compute_time_total = 0.0
+        self.compute_time_max = 0.0
+
+    async def run(self, func, *args):
+        """
+        Выполнение func в пуле, при переполненной очереди - 503.
+        """
+
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HTTPException(status_code=503,
+                                detail="Сервис перегружен, повторите позже",
+                                headers={"Retry-After": "1"})
+
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self._executor, _timed, func, *args)
+        finally:
+            self.pending -= 1
+
+        wait_time = started - submitted
+        compute_time = finished - started
+        self.completed += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.compute_time_total += compute_time
+        self.compute_time_max = max(self.compute_time_max, compute_time)
+        return result
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": max(self.pending - self.workers, 0),
+            "in_progress": min(self.pending, self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_ms_avg": self.wait_time_total / completed * 1000,
+            "wait_ms_max": self.wait_time_max * 1000,
+            "compute_ms_avg": self.compute_time_total / completed * 1000,
+            "compute_ms_max": self.compute_time_max * 1000,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+hashing_pool = HashingPool()
 
 
 async def hash_password(password: str) -> str:
     """
      Хеширование пароля.
      """
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    hashed = await hashing_pool.run(bcrypt.hashpw, password.encode('utf-8'),
+                                    bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
     return hashed.decode('utf-8')
 
 
-async def check_password(password: str, hashed_password: str) -> bool:
+def hash_rounds(hashed_password: str) -> int | None:
     """
-    Проверка хэшированного пароля.
+    Стоимость из bcrypt-хэша вида $2b$12$...
     """
-    return bcrypt.checkpw(password.encode('utf-8'),
-                          hashed_password.encode('utf-8'))
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return None
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Хэш создан с отличной от настроенной стоимостью.
+    """
+    return hash_rounds(hashed_password) != BCRYPT_ROUNDS
+
+
+async def check_password(password: str, hashed_password: str) -> bool:
+    """
+    Проверка хэшированного пароля.
+    """
+    return await hashing_pool.run(bcrypt.checkpw, password.encode('utf-8'),
+                                  hashed_password.encode('utf-8'))
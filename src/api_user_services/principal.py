@@ -0,0 +1,116 @@
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import User, Role, Permission, role_permission
+
+
+class Principal:
+    """
+    Аутентифицированный пользователь: id, email, роль и права.
+
+    Легковесная неизменяемая замена ORM-объекта User в проверке доступа.
+    ORM-сущность загружается только обработчиками, которые изменяют
+    пользователя.
+    """
+
+    __slots__ = ("id", "email", "role_id", "role_name", "permissions")
+
+    def __init__(self, id, email: str, role_id, role_name: str | None,
+                 permissions: frozenset[str]):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "email", email)
+        object.__setattr__(self, "role_id", role_id)
+        object.__setattr__(self, "role_name", role_name)
+        object.__setattr__(self, "permissions", permissions)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal неизменяем")
+
+    def __repr__(self):
+        return (f"Principal(id={self.id!r}, email={self.email!r}, "
+                f"role_name={self.role_name!r})")
+
+    @classmethod
+    def from_row(cls, row, snapshot) -> "Principal":
+        """
+        Principal из строки (id, email, ..., role_id) и снимка прав.
+        """
+
+        return cls(row.id, row.email, row.role_id,
+                   snapshot.role_name(row.role_id),
+                   snapshot.permissions(row.role_id))
+
+
+def principal_query():
+    """
+    Пользователь, его роль и права одним SQL-запросом.
+
+    Права агрегируются в json-массив, поэтому вместо цепочки
+    selectinload (users -> roles -> permissions) выполняется один
+    запрос к БД.
+    """
+
+    permissions = func.coalesce(
+        func.json_agg(
+            func.json_build_object(
+                'id', Permission.id,
+                'name', Permission.name,
+                'code', Permission.code,
+                'description', Permission.description)
+        ).filter(Permission.id.isnot(None)),
+        literal_column("'[]'::json"),
+        type_=JSON)
+
+    return select(
+        User.id,
+        User.email,
+        User.first_name,
+        User.last_name,
+        User.patronymic,
+        User.hashed_password,
+        User.is_active,
+        User.registered_at,
+        User.role_id,
+        Role.name.label("role_name"),
+        permissions.label("permissions"),
+    ).join(
+        Role, Role.id == User.role_id
+    ).outerjoin(
+        role_permission, role_permission.c.role_id == Role.id
+    ).outerjoin(
+        Permission, Permission.id == role_permission.c.permission_id
+    ).group_by(User.id, Role.id)
+
+
+async def query_principal(email: str, session: AsyncSession):
+    """
+    Строка пользователя с ролью и правами по email.
+    """
+
+    stmt = principal_query().where(User.email == email)
+    result = await session.execute(stmt)
+    return result.first()
+
+
+def user_with_role(row) -> dict:
+    """
+    Строка principal_query в формате схемы UserWithRole.
+    """
+
+    return {
+        "id": row.id,
+        "email": row.email,
+        "first_name": row.first_name,
+        "last_name": row.last_name,
+        "patronymic": row.patronymic,
+        "hashed_password": row.hashed_password,
+        "is_active": row.is_active,
+        "registered_at": row.registered_at,
+        "role_id": row.role_id,
+        "role": {
+            "id": row.role_id,
+            "name": row.role_name,
+            "permissions": row.permissions,
+        },
+    }
@@ -0,0 +1,157 @@
+import ipaddress
+import math
+import os
+import time
+import zlib
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+RATE_LIMIT_IP_RATE = float(os.getenv('RATE_LIMIT__IP_RATE', 5))
+RATE_LIMIT_IP_BURST = float(os.getenv('RATE_LIMIT__IP_BURST', 20))
+RATE_LIMIT_EMAIL_RATE = float(os.getenv('RATE_LIMIT__EMAIL_RATE', 0.2))
+RATE_LIMIT_EMAIL_BURST = float(os.getenv('RATE_LIMIT__EMAIL_BURST', 5))
+RATE_LIMIT_SHARDS = int(os.getenv('RATE_LIMIT__SHARDS', 16))
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT__MAX_KEYS', 100000))
+# Адреса прокси (IP или сети через запятую), которым доверяется
+# X-Forwarded-For. Без них ключом служит адрес соединения.
+RATE_LIMIT_TRUSTED_PROXIES = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv('RATE_LIMIT__TRUSTED_PROXIES', '').split(',')
+    if network.strip()]
+
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in RATE_LIMIT_TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str | None:
+    """
+    IP клиента для лимита. Если соединение пришло от доверенного прокси,
+    берется последний адрес X-Forwarded-For, не принадлежащий доверенным
+    прокси (левые адреса клиент может подделать).
+    """
+
+    if request.client is None:
+        return None
+    address = request.client.host
+    if not is_trusted_proxy(address):
+        return address
+
+    forwarded = request.headers.get("x-forwarded-for", "")
+    for hop in reversed([hop.strip() for hop in forwarded.split(",")]):
+        if not hop:
+            continue
+        address = hop
+        if not is_trusted_proxy(hop):
+            break
+    return address
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket по ключу с шардированным состоянием.
+
+    Каждый шард хранит не больше max_keys / shards ключей, при
+    переполнении вытесняются давно не использованные. rate или burst <= 0
+    отключают ограничение.
+    """
+
+    def __init__(self, rate: float, burst: float,
+                 shards: int = RATE_LIMIT_SHARDS,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.enabled = rate > 0 and burst > 0
+        self.shard_size = max(max_keys // shards, 1)
+        self._shards: list[OrderedDict[str, tuple[float, float]]] = [
+            OrderedDict() for _ in range(shards)]
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def _shard(self, key: str) -> OrderedDict:
+        index = zlib.crc32(key.encode('utf-8')) % len(self._shards)
+        return self._shards[index]
+
+    def acquire(self, key: str) -> float:
+        """
+        Списание токена. Возвращает 0, если запрос разрешен, иначе
+        через сколько секунд появится токен.
+        """
+
+        if not self.enabled:
+            self.allowed += 1
+            return 0.0
+
+        shard = self._shard(key)
+        now = time.monotonic()
+        tokens, updated_at = shard.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+            self.allowed += 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+            self.rejected += 1
+
+        shard[key] = (tokens, now)
+        shard.move_to_end(key)
+        while len(shard) > self.shard_size:
+            shard.popitem(last=False)
+            self.evicted += 1
+
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "keys": sum(len(shard) for shard in self._shards),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+        }
+
+
+class AuthAdmission:
+    """
+    Ограничение частоты /login и /register по IP клиента и по email.
+    """
+
+    def __init__(self):
+        self.by_ip = TokenBucketLimiter(rate=RATE_LIMIT_IP_RATE,
+                                        burst=RATE_LIMIT_IP_BURST)
+        self.by_email = TokenBucketLimiter(rate=RATE_LIMIT_EMAIL_RATE,
+                                           burst=RATE_LIMIT_EMAIL_BURST)
+
+    def admit(self, client_ip: str | None, email: str):
+        """
+        Проверка лимитов до поиска пользователя и проверки пароля.
+        """
+
+        retry_after = 0.0
+        if client_ip:
+            retry_after = self.by_ip.acquire(client_ip)
+        if not retry_after:
+            retry_after = self.by_email.acquire(email.lower())
+
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Слишком много попыток, повторите позже",
+                headers={"Retry-After": str(math.ceil(retry_after))})
+
+    def stats(self) -> dict:
+        return {
+            "ip": self.by_ip.stats(),
+            "email": self.by_email.stats(),
+        }
+
+
+auth_admission = AuthAdmission()
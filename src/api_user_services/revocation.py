@@ -0,0 +1,82 @@
+import os
+import time
+from collections import OrderedDict
+
+from src.database.invalidation import USER_DEACTIVATED, USER_ROLE_CHANGED, \
+    RESYNC
+
+# Сколько хранить отметку об отзыве: не меньше срока жизни токена.
+REVOKE_TTL = int(os.getenv('INVALIDATION__REVOKE_TTL', 86400))
+
+
+class RevokedUsers:
+    """
+    Пользователи, деактивированные или сменившие роль после выдачи токена.
+
+    Токены таких пользователей, выпущенные до события, не проверяются по
+    полям токена, а проходят обычную проверку через БД. После RESYNC
+    (пропущенные события) так проверяются все токены, выпущенные до него.
+
+    Отдельно хранятся деактивации: токены деактивированных пользователей,
+    выпущенные до события, отозваны (по ним закрываются долгие потоки).
+    """
+
+    def __init__(self, ttl: int = REVOKE_TTL):
+        self.ttl = ttl
+        self._revoked: OrderedDict[str, float] = OrderedDict()
+        self._deactivated: OrderedDict[str, float] = OrderedDict()
+        self.not_before = 0.0
+        self.resyncs = 0
+
+    def _mark(self, marks: OrderedDict, user_id: str):
+        now = time.time()
+        marks[str(user_id)] = now
+        marks.move_to_end(str(user_id))
+        while marks:
+            oldest = next(iter(marks.values()))
+            if oldest > now - self.ttl:
+                break
+            marks.popitem(last=False)
+
+    def revoke(self, user_id: str):
+        self._mark(self._revoked, user_id)
+
+    def deactivate(self, user_id: str):
+        self._mark(self._revoked, user_id)
+        self._mark(self._deactivated, user_id)
+
+    def is_stale(self, user_id: str, issued_at: int) -> bool:
+        if issued_at <= self.not_before:
+            return True
+        revoked_at = self._revoked.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def is_deactivated(self, user_id: str, issued_at: int) -> bool:
+        """
+        Пользователь деактивирован после выдачи токена. iat хранится с
+        точностью до секунды: токен, выданный в ту же секунду (например,
+        при повторном входе), не считается отозванным.
+        """
+
+        deactivated_at = self._deactivated.get(user_id)
+        return deactivated_at is not None and \
+            issued_at < int(deactivated_at)
+
+    async def handle_event(self, event: dict):
+        if event["event"] == USER_DEACTIVATED:
+            self.deactivate(event["user_id"])
+        elif event["event"] == USER_ROLE_CHANGED:
+            self.revoke(event["user_id"])
+        elif event["event"] == RESYNC:
+            self.not_before = time.time()
+            self.resyncs += 1
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "deactivated": len(self._deactivated),
+            "resyncs": self.resyncs,
+        }
+
+
+revoked_users = RevokedUsers()
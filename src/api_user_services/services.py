@@ -7,15 +7,24 @@ import jwt
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api_user_services.auth import query_user_by_email, \
-    protected_route, validation_role
-from src.api_user_services.hashing import hash_password, check_password
+    protected_route, validation_role, permission_claims, \
+    JWT_EMBED_PERMISSIONS
+from src.api_user_services.hashing import hash_password, check_password, \
+    needs_rehash
+from src.api_user_services.principal import Principal
+from src.api_user_services.rate_limit import auth_admission
 from src.api_user_services.schemes import UserCreate, UserCreateResponse, \
     UserLogin, UserLoginResponse, UpdateUser, UpdateUserResponse, \
     LogoutUserResponse
+from src.database.database import mark_write
 from src.database.database_utils import add_to_session, commit_session
+from src.database.invalidation import invalidation_bus, USER_DEACTIVATED
+from src.database.write_behind import login_writes
+from src.load_permissions.snapshot import permission_registry
 from src.models.models import User
 
 load_dotenv()
@@ -29,12 +38,15 @@ class AuthService:
     async def handle_create_user(self,
                                  user_schema: UserCreate,
                                  session: AsyncSession,
+                                 client_ip: str | None = None,
                                  ):
         """
         Регистрация пользователя
 
         """
 
+        auth_admission.admit(client_ip=client_ip, email=user_schema.email)
+
         user = await query_user_by_email(email=user_schema.email,
                                          session=session)
 
@@ -73,11 +85,16 @@ class AuthService:
 
     async def handle_user_login(self,
                                 user_schema: UserLogin,
-                                session: AsyncSession):
+                                session: AsyncSession,
+                                client_ip: str | None = None):
 
         """
         Вход пользователя в аккаунт
         """
+
+        # Лимит попыток проверяется до поиска пользователя и bcrypt.
+        auth_admission.admit(client_ip=client_ip, email=user_schema.email)
+
         user = await query_user_by_email(email=user_schema.email,
                                          session=session)
 
@@ -98,6 +115,31 @@ class AuthService:
             raise HTTPException(
                 status_code=401, detail="Неверные учетные данные")
 
+        # Пароль с устаревшей стоимостью bcrypt перехешируется и
+        # сохраняется сразу: это редкая запись.
+        if needs_rehash(hashed_password):
+            user.hashed_password = await hash_password(
+                password=user_schema.password)
+            await commit_session(session=session)
+
+        # При авторизации присваивается роль user. Смена роли (при первом
+        # входе) сохраняется сразу: выданный токен должен проверяться уже
+        # с новой ролью. Время входа записывается отложенно, пачками.
+        role_id = permission_registry.snapshot.role_id("user")
+        if role_id is None:
+            role = await validation_role(role="user", session=session)
+            role_id = role.id
+        role_changed = user.role_id != role_id
+        logged_in_at = datetime.now()
+
+        if role_changed:
+            user.role_id = role_id
+            user.last_login_at = logged_in_at
+            await commit_session(session=session)
+        elif not login_writes.enqueue(user.id, logged_in_at):
+            user.last_login_at = logged_in_at
+            await commit_session(session=session)
+
         # Формирование JWT-токена.
         payload = {
             'sub': str(user.id) if user else None,
@@ -108,15 +150,16 @@ class AuthService:
                 (datetime.now(timezone.utc) + timedelta(days=1)).timestamp())
         }
 
+        if JWT_EMBED_PERMISSIONS:
+            snapshot = await permission_registry.resolve(role_id, session)
+            payload.update(permission_claims(role_id, snapshot))
+
         jwt_token = jwt.encode(payload, JWT_SECRET,
                                algorithm=JWT_ALGORITHM)
-
-        # При авторизации присваивается роль user.
-        if user:
-            role = await validation_role(role="user", session=session)
-            user.role_id = role.id
-
-        await commit_session(session=session)
+        # Запросы с новым токеном сразу после смены роли читают из
+        # основной БД, а не с отстающей реплики.
+        if role_changed:
+            mark_write(client=jwt_token)
 
         response = UserLoginResponse(
             message="Вы вошли в аккаунт!",
@@ -128,7 +171,7 @@ class AuthService:
     @protected_route
     async def handle_update_user(self,
                                  user_schema: UpdateUser,
-                                 authenticated_user: User,
+                                 authenticated_user: Principal,
                                  jwt_token: str,
                                  session: AsyncSession,
                                  *args, **kwargs
@@ -139,10 +182,13 @@ class AuthService:
 
         """
 
+        # ORM-сущность нужна только здесь, где пользователь изменяется.
+        user = await session.get(User, authenticated_user.id)
+
         if user_schema.password:
 
             # Получаем хэшированный пароль из базы данных.
-            hashed_password = authenticated_user.hashed_password
+            hashed_password = user.hashed_password
 
             # Проверяем введенный пароль с хэш.паролем из базы данных.
             is_valid = await check_password(password=user_schema.password,
@@ -153,16 +199,16 @@ class AuthService:
 
         for field, value in user_schema:
             if value:
-                setattr(authenticated_user, field, value)
+                setattr(user, field, value)
 
         await commit_session(session=session)
 
         response = UpdateUserResponse(
             message="Обновление профиля прошло успешно!",
-            first_name=authenticated_user.first_name,
-            last_name=authenticated_user.last_name,
-            patronymic=authenticated_user.patronymic,
-            email=authenticated_user.email
+            first_name=user.first_name,
+            last_name=user.last_name,
+            patronymic=user.patronymic,
+            email=user.email
 
         )
 
@@ -170,7 +216,7 @@ class AuthService:
 
     @protected_route
     async def handle_logout_user(self,
-                                 authenticated_user: User,
+                                 authenticated_user: Principal,
                                  jwt_token: str,
                                  session: AsyncSession,
                                  *args, **kwargs):
@@ -178,11 +224,19 @@ class AuthService:
         """ Выход из системы"""
 
         if authenticated_user:
-            # Учетную запись оставляем.
-            authenticated_user.is_active = False
             # Присваивается роль quest.
-            role = await validation_role(role="guest", session=session)
-            authenticated_user.role_id = role.id
+            role_id = permission_registry.snapshot.role_id("guest")
+            if role_id is None:
+                role = await validation_role(role="guest", session=session)
+                role_id = role.id
+
+            # Учетную запись оставляем.
+            stmt = update(User).where(
+                User.id == authenticated_user.id).values(
+                is_active=False, role_id=role_id)
+            await session.execute(stmt)
+            await invalidation_bus.publish(session, USER_DEACTIVATED,
+                                           user_id=authenticated_user.id)
 
             await commit_session(session=session)
 
@@ -0,0 +1,87 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+JWT_CACHE_SIZE = int(os.getenv('JWT__CACHE_SIZE', 10000))
+JWT_CACHE_TTL = int(os.getenv('JWT__CACHE_TTL', 300))
+
+
+class TokenCache:
+    """
+    Кэш проверенных payload jwt-токенов (LRU с ограничением по времени).
+
+    Ключ - sha256 от токена, запись живет не дольше поля exp токена.
+    """
+
+    def __init__(self, max_size: int = JWT_CACHE_SIZE,
+                 ttl: int = JWT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> dict | None:
+        """
+        Получение payload из кэша, просроченные записи удаляются.
+        """
+
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict):
+        """
+        Сохранение проверенного payload в кэш.
+        """
+
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= time.time():
+            return
+
+        key = self._key(token)
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+token_cache = TokenCache()
@@ -11,4 +11,21 @@ DB_USER = os.getenv('POSTGRES__USER')
 DB_PASS = os.getenv('POSTGRES__PASSWORD')
 DB_HOST = os.getenv('POSTGRES__HOST')
 DB_PORT = os.getenv('POSTGRES__PORT')
-DB_NAME = os.getenv('POSTGRES__DB')
\ No newline at end of file
+DB_NAME = os.getenv('POSTGRES__DB')
+
+# Пул соединений
+DB_POOL_SIZE = int(os.getenv('POSTGRES__POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('POSTGRES__MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('POSTGRES__POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('POSTGRES__POOL_RECYCLE', -1))
+DB_POOL_PRE_PING = os.getenv(
+    'POSTGRES__POOL_PRE_PING', 'false').lower() == 'true'
+# Кэш подготовленных выражений asyncpg на одно соединение
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('POSTGRES__STATEMENT_CACHE_SIZE', 100))
+
+# Реплики только для чтения: "host" или "host:port" через запятую
+DB_REPLICA_HOSTS = [host.strip() for host in
+                    os.getenv('POSTGRES__REPLICA_HOSTS', '').split(',')
+                    if host.strip()]
+# Сколько секунд после записи чтение идет в основную БД
+DB_READ_YOUR_WRITES = float(os.getenv('POSTGRES__READ_YOUR_WRITES', 2))
@@ -1,17 +1,123 @@
+import itertools
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Annotated
+
+from fastapi import Header
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, \
     AsyncSession
 
-from src.database.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+from src.database.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, \
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, \
+    DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, DB_REPLICA_HOSTS, \
+    DB_READ_YOUR_WRITES
+from src.database.invalidation import INVALIDATION_CHANNEL
+from src.database.pool_metrics import InstrumentedAsyncPool
+
 
+def create_engine_for(host: str, port: str):
+    return create_async_engine(
+        f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{host}:{port}/{DB_NAME}"
+        f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}",
+        poolclass=InstrumentedAsyncPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        # Канал, в который триггеры публикуют события (bump_catalog_version).
+        connect_args={"server_settings": {
+            "app.invalidation_channel": INVALIDATION_CHANNEL}},
+    )
 
 
-engine = create_async_engine(
-    f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
+engine = create_engine_for(DB_HOST, DB_PORT)
 Session = async_sessionmaker(engine, class_=AsyncSession,
                              expire_on_commit=False)
 
+replica_engines = []
+for replica in DB_REPLICA_HOSTS:
+    replica_host, _, replica_port = replica.partition(":")
+    replica_engines.append(
+        create_engine_for(replica_host, replica_port or DB_PORT))
+
+ReadSessions = [async_sessionmaker(replica_engine, class_=AsyncSession,
+                                   expire_on_commit=False)
+                for replica_engine in replica_engines]
+_read_sessions = itertools.cycle(ReadSessions)
+
+# Клиент текущего запроса (jwt-токен), выставляется protected_route.
+current_client: ContextVar[str | None] = ContextVar("current_client",
+                                                    default=None)
+# Время последней записи по клиентам, старые отметки удаляются.
+_recent_writes: OrderedDict[str, float] = OrderedDict()
+
+
+def mark_write(client: str | None = None):
+    """
+    Отметка записи клиента (по умолчанию текущего): его ближайшие чтения
+    пойдут в основную БД. Запись без клиента (фоновые задачи) не
+    отмечается.
+    """
+
+    client = client or current_client.get()
+    if client is None or not ReadSessions:
+        return
+    now = time.monotonic()
+    _recent_writes[client] = now
+    _recent_writes.move_to_end(client)
+    while _recent_writes:
+        oldest = next(iter(_recent_writes.values()))
+        if oldest > now - DB_READ_YOUR_WRITES:
+            break
+        _recent_writes.popitem(last=False)
+
+
+def read_session_factory(client: str | None = None) -> async_sessionmaker:
+    """
+    Фабрика сессий для чтения: реплики по кругу, либо основная БД,
+    если реплик нет или этот клиент недавно выполнил запись
+    (read-your-writes). Записи других клиентов на выбор не влияют.
+    """
+
+    if not ReadSessions:
+        return Session
+    written_at = _recent_writes.get(client) if client else None
+    if written_at is not None and \
+            time.monotonic() - written_at < DB_READ_YOUR_WRITES:
+        return Session
+    return next(_read_sessions)
+
+
+def pool_stats() -> dict:
+    stats = {"primary": engine.pool.stats()}
+    for index, replica_engine in enumerate(replica_engines):
+        stats[f"replica_{index}"] = replica_engine.pool.stats()
+    return stats
+
 
 async def get_async_session():
+    """
+    Сессия запроса.
+
+    Соединение берется из пула только при первом запросе к БД, поэтому
+    запросы, отклоненные до обращения к БД (нет токена, неверная
+    подпись), соединение не занимают. Зависимость подключается с
+    scope="function": сессия закрывается и соединение возвращается в пул
+    сразу после выполнения обработчика, до сериализации и отправки ответа.
+    """
+
     async with Session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_read_session(
+        jwt_token: Annotated[str | None, Header(alias="Jwt-Token")] = None):
+    """
+    Сессия только для чтения (реплика, если настроена). Клиент, который
+    только что выполнил запись, читает из основной БД.
+    """
+
+    async with read_session_factory(jwt_token)() as session:
+        yield session
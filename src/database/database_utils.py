@@ -1,6 +1,8 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.database.database import mark_write
+
 
 async def commit_session(session: AsyncSession):
     """
@@ -8,6 +10,7 @@ async def commit_session(session: AsyncSession):
     """
     try:
         await session.commit()
+        mark_write()
     except Exception as e:
         await session.rollback()
         raise HTTPException(
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable
+
+import asyncpg
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+
+INVALIDATION_CHANNEL = os.getenv('INVALIDATION__CHANNEL',
+                                 'cache_invalidation')
+INVALIDATION_KEEPALIVE = float(os.getenv('INVALIDATION__KEEPALIVE', 10))
+INVALIDATION_RECONNECT_MAX = float(
+    os.getenv('INVALIDATION__RECONNECT_MAX', 30))
+
+# Типы событий.
+USER_DEACTIVATED = "user_deactivated"
+USER_ROLE_CHANGED = "user_role_changed"
+ROLE_PERMISSIONS_CHANGED = "role_permissions_changed"
+POSTS_CHANGED = "posts_changed"
+# Публикуется триггером bump_catalog_version при изменении products.
+CATALOG_CHANGED = "catalog_changed"
+# Локальное событие после переподключения: часть событий могла быть
+# пропущена, подписчики перечитывают состояние целиком.
+RESYNC = "resync"
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class InvalidationBus:
+    """
+    Канал инвалидации кэшей между воркерами через LISTEN/NOTIFY.
+
+    Событие публикуется через pg_notify в транзакции изменения и
+    доставляется слушателям только после ее коммита (при откате - не
+    доставляется). Каждый воркер слушает канал на отдельном соединении
+    asyncpg вне пула и передает события подписчикам по порядку. При потере
+    соединения переподключается с экспоненциальной задержкой и рассылает
+    RESYNC.
+    """
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL,
+                 keepalive: float = INVALIDATION_KEEPALIVE,
+                 reconnect_max: float = INVALIDATION_RECONNECT_MAX):
+        self.channel = channel
+        self.keepalive = keepalive
+        self.reconnect_max = reconnect_max
+        self._handlers: list[Handler] = []
+        self._queue: asyncio.Queue | None = None
+        self._listener: asyncio.Task | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+        self.failed = 0
+
+    def subscribe(self, handler: Handler):
+        self._handlers.append(handler)
+
+    async def publish(self, session: AsyncSession, event: str, **fields):
+        """
+        Публикация события в транзакции сессии. Вызывается до коммита.
+        """
+
+        payload = json.dumps({"event": event, **fields}, default=str)
+        await session.execute(select(func.pg_notify(self.channel, payload)))
+        self.published += 1
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._listener = asyncio.create_task(self._listen())
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        for task in (self._listener, self._dispatcher):
+            if task is not None:
+                task.cancel()
+        for task in (self._listener, self._dispatcher):
+            if task is not None:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener = None
+        self._dispatcher = None
+        self._queue = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        self.received += 1
+        self._queue.put_nowait(event)
+
+    async def _listen(self):
+        delay = 0.1
+        # Первое подключение при старте воркера: состояние только что
+        # загружено, пересинхронизация не нужна.
+        first = True
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    user=DB_USER, password=DB_PASS, host=DB_HOST,
+                    port=int(DB_PORT) if DB_PORT else None,
+                    database=DB_NAME)
+            except Exception as e:
+                print(f"Канал инвалидации недоступен: {e}")
+                first = False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max)
+                continue
+
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(self.channel, self._on_notify)
+                self.connected = True
+                delay = 0.1
+                if not first:
+                    self.reconnects += 1
+                    self._queue.put_nowait({"event": RESYNC})
+                first = False
+
+                # Обрыв TCP без закрытия соединения обнаруживается
+                # периодическим запросом.
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.keepalive)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1",
+                                                 timeout=self.keepalive)
+            except Exception as e:
+                print(f"Соединение канала инвалидации потеряно: {e}")
+            finally:
+                self.connected = False
+                connection.terminate()
+
+    async def _dispatch(self):
+        while True:
+            event = await self._queue.get()
+            for handler in self._handlers:
+                try:
+                    await handler(event)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Ошибка обработки события {event}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "failed": self.failed,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+        }
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+
+from src.database.database import Session
+
+LOGIN_WRITES_FLUSH_INTERVAL_MS = int(
+    os.getenv('LOGIN_WRITES__FLUSH_INTERVAL_MS', 100))
+LOGIN_WRITES_BATCH_SIZE = int(os.getenv('LOGIN_WRITES__BATCH_SIZE', 500))
+LOGIN_WRITES_QUEUE_SIZE = int(os.getenv('LOGIN_WRITES__QUEUE_SIZE', 10000))
+LOGIN_WRITES_MAX_RETRIES = int(os.getenv('LOGIN_WRITES__MAX_RETRIES', 5))
+
+# Один запрос на пачку: массивы разворачиваются в строки (id,
+# last_login_at), форма запроса не зависит от размера пачки.
+FLUSH_STATEMENT = text("""
+    UPDATE users
+    SET last_login_at = v.last_login_at
+    FROM unnest(CAST(:ids AS UUID[]), CAST(:logged_in_at AS TIMESTAMP[]))
+        AS v(id, last_login_at)
+    WHERE users.id = v.id
+""")
+
+
+class LoginWriteBuffer:
+    """
+    Отложенная запись времени входа.
+
+    Записи копятся в asyncio-очереди и сбрасываются фоновой задачей
+    одним UPDATE на пачку - раз в LOGIN_WRITES__FLUSH_INTERVAL_MS мс или
+    при наборе LOGIN_WRITES__BATCH_SIZE записей. Несколько входов одного
+    пользователя в пачке схлопываются в последний. Пачка, которую
+    не удалось записать, повторяется с экспоненциальной задержкой до
+    LOGIN_WRITES__MAX_RETRIES раз.
+    """
+
+    def __init__(self, interval_ms: int = LOGIN_WRITES_FLUSH_INTERVAL_MS,
+                 batch_size: int = LOGIN_WRITES_BATCH_SIZE,
+                 queue_size: int = LOGIN_WRITES_QUEUE_SIZE,
+                 max_retries: int = LOGIN_WRITES_MAX_RETRIES):
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Сброс оставшихся записей и остановка фоновой задачи.
+        """
+
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def enqueue(self, user_id: uuid.UUID, logged_in_at: datetime) -> bool:
+        """
+        Постановка записи в очередь. False - буфер не запущен или
+        переполнен, запись нужно выполнить сразу.
+        """
+
+        if self._task is None:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait((user_id, logged_in_at))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = {item[0]: item}
+            deadline = loop.time() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch[item[0]] = item
+
+            await self._flush(list(batch.values()))
+
+        # Записи, попавшие в очередь после сигнала остановки.
+        rest = {}
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                rest[item[0]] = item
+        if rest:
+            await self._flush(list(rest.values()))
+
+    async def _flush(self, batch: list[tuple]):
+        ids, logged_in_at = zip(*batch)
+        params = {
+            "ids": list(ids),
+            "logged_in_at": list(logged_in_at),
+        }
+        attempt = 0
+        while True:
+            try:
+                async with Session() as session:
+                    await session.execute(FLUSH_STATEMENT, params)
+                    await session.commit()
+                break
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.failed += len(batch)
+                    print(f"Ошибка записи данных входа, пачка из "
+                          f"{len(batch)} записей отброшена: {e}")
+                    return
+                self.retries += 1
+                print(f"Ошибка записи данных входа, повтор: {e}")
+                await asyncio.sleep(self.interval * 2 ** attempt)
+                attempt += 1
+        self.flushed += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
+
+
+login_writes = LoginWriteBuffer()
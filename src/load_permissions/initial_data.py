@@ -1,75 +1,144 @@
+import hashlib
 import json
+import uuid
 from pathlib import Path
 from fastapi import FastAPI
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, text
+from sqlalchemy import delete, select, func, tuple_, exists
+from sqlalchemy.dialects.postgresql import insert
 from contextlib import asynccontextmanager
 
+from src.api_user_services.hashing import hashing_pool
+from src.api_user_services.revocation import revoked_users
 from src.database.database import Session
+from src.database.invalidation import invalidation_bus, \
+    ROLE_PERMISSIONS_CHANGED
+from src.database.write_behind import login_writes
+from src.load_permissions.snapshot import permission_registry
+from src.mockobjects.change_feed import change_feed
 
-from src.models.models import Role, Permission, role_permission, User
+from src.models.models import Role, Permission, role_permission, User, \
+    SeedState
 
 file_path = Path(__file__).parent / "role_permissions.json"
 
+SEED_NAME = "role_permissions"
+# Ключ advisory lock, сериализующего загрузку между воркерами.
+SEED_LOCK_KEY = 550840001
+
+
+async def seed_permissions(session: AsyncSession) -> bool:
+    """
+    Синхронизация ролей и прав с role_permissions.json.
+
+    Выполняется в одной транзакции под advisory lock. Если хэш файла
+    совпадает с сохраненным, ничего не делает. Иначе применяет разницу:
+    удаляет лишнее и добавляет/обновляет остальное через
+    INSERT ... ON CONFLICT. Возвращает True, если данные изменились.
+    """
+
+    raw = file_path.read_bytes()
+    checksum = hashlib.sha256(raw).hexdigest()
+
+    await session.execute(select(func.pg_advisory_xact_lock(SEED_LOCK_KEY)))
+
+    stored = await session.scalar(
+        select(SeedState.checksum).where(SeedState.name == SEED_NAME))
+    if stored == checksum:
+        return False
+
+    data = json.loads(raw)
+
+    roles = [{"id": uuid.UUID(role_data["id"]), "name": role_data["name"]}
+             for role_data in data.get("roles", [])]
+    permissions = [{"id": uuid.UUID(perm_data["id"]),
+                    "name": perm_data["name"],
+                    "code": perm_data["code"],
+                    "description": perm_data.get("description", "")}
+                   for perm_data in data.get("permissions", [])]
+
+    role_ids = [role["id"] for role in roles]
+    permission_ids = [perm["id"] for perm in permissions]
+    links = [(uuid.UUID(rp_data["role_id"]),
+              uuid.UUID(rp_data["permission_id"]))
+             for rp_data in data.get("role_permissions", [])]
+    links = [(role_id, perm_id) for role_id, perm_id in links
+             if role_id in role_ids and perm_id in permission_ids]
+
+    # Удаление связей, прав и ролей, которых нет в файле. Роли, которые
+    # назначены пользователям, не удаляются.
+    stmt = delete(role_permission)
+    if links:
+        stmt = stmt.where(tuple_(role_permission.c.role_id,
+                                 role_permission.c.permission_id).not_in(links))
+    await session.execute(stmt)
+
+    await session.execute(
+        delete(Permission).where(Permission.id.not_in(permission_ids)))
+
+    await session.execute(
+        delete(Role).where(Role.id.not_in(role_ids),
+                           ~exists().where(User.role_id == Role.id)))
+
+    if roles:
+        stmt = insert(Role).values(roles)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[Role.id],
+            set_={"name": stmt.excluded.name}))
+
+    if permissions:
+        stmt = insert(Permission).values(permissions)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[Permission.id],
+            set_={"name": stmt.excluded.name,
+                  "code": stmt.excluded.code,
+                  "description": stmt.excluded.description}))
+
+    if links:
+        await session.execute(insert(role_permission).values(
+            [{"role_id": role_id, "permission_id": perm_id}
+             for role_id, perm_id in links]).on_conflict_do_nothing())
+
+    stmt = insert(SeedState).values(name=SEED_NAME, checksum=checksum)
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[SeedState.name],
+        set_={"checksum": stmt.excluded.checksum,
+              "updated_at": func.current_timestamp()}))
+
+    return True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Создаем сессию один раз
     async with Session() as session:
         try:
-
-            # await session.execute(delete(User))
-            await session.execute(delete(role_permission))
-            await session.execute(delete(Permission))
-            await session.execute(delete(Role))
-            await session.commit()
-
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-
-            roles_dict = {}
-            permissions_dict = {}
-
-            if "roles" in data:
-                for role_data in data["roles"]:
-                    role = Role(id=role_data["id"], name=role_data["name"])
-                    roles_dict[role_data["id"]] = role
-                    session.add(role)
-
-            if "permissions" in data:
-                for perm_data in data["permissions"]:
-                    perm = Permission(
-                        id=perm_data["id"],
-                        name=perm_data["name"],
-                        code=perm_data["code"],
-                        description=perm_data.get("description", "")
-                    )
-                    permissions_dict[perm_data["id"]] = perm
-                    session.add(perm)
-
-            if "role_permissions" in data:
-                for rp_data in data["role_permissions"]:
-                    role_id = rp_data["role_id"]
-                    perm_id = rp_data["permission_id"]
-                    role = roles_dict.get(role_id)
-                    permission = permissions_dict.get(perm_id)
-                    if role and permission:
-                        role.permissions.append(permission)
-
+            # Остальные воркеры перечитают снимок прав после коммита.
+            if await seed_permissions(session):
+                await invalidation_bus.publish(session,
+                                               ROLE_PERMISSIONS_CHANGED)
             await session.commit()
 
         except Exception as e:
             print(f"Ошибка загрузки данных: {e}")
             await session.rollback()
 
+        try:
+            await permission_registry.refresh(session)
+        except Exception as e:
+            print(f"Ошибка загрузки снимка прав: {e}")
+            await session.rollback()
+
+    login_writes.start()
+    invalidation_bus.subscribe(permission_registry.handle_event)
+    invalidation_bus.subscribe(revoked_users.handle_event)
+    invalidation_bus.subscribe(change_feed.handle_event)
+    invalidation_bus.start()
+
     yield
 
-    try:
-        # await session.execute(delete(User))
-        await session.execute(delete(role_permission))
-        await session.execute(delete(Permission))
-        await session.execute(delete(Role))
-        await session.commit()
-    except Exception as e:
-        print(f"Ошибка при очистке: {e}")
-        await session.rollback().rollback()
+    # Роли и права при остановке не удаляются: другие воркеры продолжают
+    # работать с ними.
+    await invalidation_bus.stop()
+    await login_writes.stop()
+    hashing_pool.shutdown()
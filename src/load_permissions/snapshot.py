@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import uuid
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.database import Session
+from src.database.invalidation import ROLE_PERMISSIONS_CHANGED, RESYNC
+from src.models.models import Role, Permission, role_permission
+
+
+class PermissionSnapshot:
+    """
+    Неизменяемый снимок ролей и их прав: id роли -> frozenset кодов прав.
+
+    Каждому коду права назначается бит (по алфавиту кодов), роли
+    соответствует битовая маска. Версия - хэш от содержимого снимка,
+    поэтому при любом изменении набора прав она меняется.
+    """
+
+    def __init__(self, role_names: dict[uuid.UUID, str],
+                 role_permissions: dict[uuid.UUID, frozenset[str]]):
+        self.role_names = MappingProxyType(dict(role_names))
+        self.role_ids = MappingProxyType(
+            {name: role_id for role_id, name in role_names.items()})
+        self.role_permissions = MappingProxyType(dict(role_permissions))
+
+        codes = sorted(set().union(*role_permissions.values()))
+        self.bits = MappingProxyType(
+            {code: 1 << position for position, code in enumerate(codes)})
+        self.role_masks = MappingProxyType({
+            role_id: sum(self.bits[code] for code in role_codes)
+            for role_id, role_codes in role_permissions.items()})
+
+        canonical = "|".join(
+            f"{role_id}:{role_names[role_id]}:{self.mask(role_id)}"
+            for role_id in sorted(role_names, key=str))
+        canonical += "|" + ",".join(codes)
+        self.version = hashlib.sha256(
+            canonical.encode('utf-8')).hexdigest()[:16]
+
+    def __contains__(self, role_id) -> bool:
+        return role_id in self.role_names
+
+    def role_name(self, role_id) -> str | None:
+        return self.role_names.get(role_id)
+
+    def role_id(self, name: str) -> uuid.UUID | None:
+        return self.role_ids.get(name)
+
+    def permissions(self, role_id) -> frozenset[str]:
+        return self.role_permissions.get(role_id, frozenset())
+
+    def bit(self, code: str) -> int:
+        return self.bits.get(code, 0)
+
+    def mask(self, role_id) -> int:
+        return self.role_masks.get(role_id, 0)
+
+
+class PermissionRegistry:
+    """
+    Хранит текущий снимок прав и атомарно заменяет его при перезагрузке.
+    """
+
+    def __init__(self):
+        self.snapshot = PermissionSnapshot({}, {})
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, session: AsyncSession) -> PermissionSnapshot:
+        """
+        Загрузка ролей и прав из БД одним запросом.
+        """
+
+        async with self._lock:
+            stmt = select(Role.id, Role.name, Permission.code).outerjoin(
+                role_permission, role_permission.c.role_id == Role.id
+            ).outerjoin(
+                Permission, Permission.id == role_permission.c.permission_id)
+            rows = await session.execute(stmt)
+
+            role_names = {}
+            role_permissions = {}
+            for role_id, role_name, code in rows:
+                role_names[role_id] = role_name
+                codes = role_permissions.setdefault(role_id, set())
+                if code:
+                    codes.add(code)
+
+            # Замена ссылки атомарна: читатели видят либо старый, либо
+            # новый снимок целиком.
+            self.snapshot = PermissionSnapshot(
+                role_names,
+                {role_id: frozenset(codes)
+                 for role_id, codes in role_permissions.items()})
+            return self.snapshot
+
+    async def resolve(self, role_id,
+                      session: AsyncSession) -> PermissionSnapshot:
+        """
+        Текущий снимок, перечитывается если роль в нем отсутствует.
+        """
+
+        snapshot = self.snapshot
+        if role_id not in snapshot:
+            snapshot = await self.refresh(session)
+        return snapshot
+
+    async def handle_event(self, event: dict):
+        """
+        Перечитывание снимка при изменении прав ролей в другом воркере.
+        """
+
+        if event["event"] in (ROLE_PERMISSIONS_CHANGED, RESYNC):
+            async with Session() as session:
+                await self.refresh(session)
+
+
+permission_registry = PermissionRegistry()
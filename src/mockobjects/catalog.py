@@ -0,0 +1,166 @@
+import base64
+import binascii
+import os
+from typing import Any, Dict
+
+from fastapi import HTTPException
+from sqlalchemy import select, func, tuple_, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import Product, CatalogVersion
+
+CATALOG_PAGE_SIZE = int(os.getenv('CATALOG__PAGE_SIZE', 50))
+CATALOG_MAX_PAGE_SIZE = int(os.getenv('CATALOG__MAX_PAGE_SIZE', 500))
+
+
+def encode_cursor(sort: str, product: Dict[str, Any]) -> str:
+    """
+    Курсор страницы: сортировка и ключ последнего продукта.
+    """
+
+    if sort == "id":
+        value = f"{sort}|{product['id']}"
+    else:
+        value = f"{sort}|{product['price']!r}|{product['id']}"
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        parts = value.split("|")
+        if parts[0] != sort:
+            raise ValueError(parts[0])
+        if sort == "id":
+            return int(parts[1])
+        return float(parts[1]), int(parts[2])
+    except (binascii.Error, UnicodeError, ValueError, IndexError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def product_filters(category: str | None, min_price: float | None,
+                    max_price: float | None) -> list:
+    filters = []
+    if category is not None:
+        filters.append(Product.category == category)
+    if min_price is not None:
+        filters.append(Product.price >= min_price)
+    if max_price is not None:
+        filters.append(Product.price <= max_price)
+    return filters
+
+
+async def catalog_version(session: AsyncSession) -> int:
+    """
+    Версия каталога: увеличивается триггером при любом изменении products.
+    """
+
+    version = await session.scalar(
+        select(CatalogVersion.version).where(
+            CatalogVersion.name == Product.__tablename__))
+    return version or 0
+
+
+async def query_products(session: AsyncSession,
+                         category: str | None = None,
+                         min_price: float | None = None,
+                         max_price: float | None = None,
+                         sort: str = "id",
+                         cursor: str | None = None,
+                         limit: int | None = None) -> dict:
+    """
+    Страница продуктов с фильтрами: {"items": [...], "next_cursor"}.
+
+    Keyset-пагинация по (price, id) или id, без OFFSET: запрос читает из
+    индекса только строки страницы.
+    """
+
+    limit = min(limit or CATALOG_PAGE_SIZE, CATALOG_MAX_PAGE_SIZE)
+    stmt = select(Product.id, Product.name, Product.price,
+                  Product.category).where(
+        *product_filters(category, min_price, max_price))
+
+    if cursor:
+        after = decode_cursor(cursor, sort)
+        if sort == "id":
+            stmt = stmt.where(Product.id > after)
+        elif sort == "price":
+            stmt = stmt.where(tuple_(Product.price, Product.id) >
+                              tuple_(*after))
+        else:
+            stmt = stmt.where(tuple_(Product.price, Product.id) <
+                              tuple_(*after))
+
+    if sort == "id":
+        stmt = stmt.order_by(Product.id)
+    elif sort == "price":
+        stmt = stmt.order_by(Product.price, Product.id)
+    else:
+        stmt = stmt.order_by(Product.price.desc(), Product.id.desc())
+
+    rows = (await session.execute(stmt.limit(limit + 1))).mappings().all()
+    items = [dict(row) for row in rows]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(sort, items[-1])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def product_stats(session: AsyncSession,
+                        category: str | None = None,
+                        min_price: float | None = None,
+                        max_price: float | None = None,
+                        bins: int = 10) -> dict:
+    """
+    Количество и min/avg/max цены по категориям и гистограмма цен.
+
+    Агрегаты считает БД: один GROUP BY по категориям и один по
+    интервалам width_bucket.
+    """
+
+    filters = product_filters(category, min_price, max_price)
+    rows = (await session.execute(
+        select(Product.category,
+               func.count().label("count"),
+               func.min(Product.price).label("min_price"),
+               func.avg(Product.price).label("avg_price"),
+               func.max(Product.price).label("max_price"))
+        .where(*filters)
+        .group_by(Product.category)
+        .order_by(Product.category))).mappings().all()
+
+    categories = [{**row, "avg_price": float(row["avg_price"])}
+                  for row in rows]
+    count = sum(row["count"] for row in categories)
+
+    edges, counts = [], []
+    if count:
+        low = min(row["min_price"] for row in categories)
+        high = max(row["max_price"] for row in categories)
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        width = (high - low) / bins
+        edges = [low + width * position for position in range(bins)]
+        edges.append(high)
+
+        # width_bucket относит максимум к интервалу bins + 1, он
+        # присоединяется к последнему. Границы и интервалы считаются
+        # разными запросами: цена, добавленная между ними за пределами
+        # [low, high], попадает в крайний интервал, а не в 0 или bins + 1.
+        bucket = func.greatest(func.least(
+            func.width_bucket(Product.price, low, high, bins),
+            bins), 1).label("bucket")
+        counts = [0] * bins
+        buckets = await session.execute(
+            select(bucket, func.count()).where(*filters).group_by(
+                literal_column("bucket")))
+        for position, bucket_count in buckets:
+            counts[position - 1] = bucket_count
+
+    return {
+        "count": count,
+        "categories": categories,
+        "histogram": {"edges": edges, "counts": counts},
+    }
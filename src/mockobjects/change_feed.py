@@ -0,0 +1,289 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api_user_services.revocation import revoked_users
+from src.database.invalidation import invalidation_bus, POSTS_CHANGED, \
+    CATALOG_CHANGED, RESYNC
+from src.models.models import CatalogVersion
+
+FEED_HISTORY = int(os.getenv('FEED__HISTORY', 1000))
+FEED_QUEUE_SIZE = int(os.getenv('FEED__QUEUE_SIZE', 100))
+FEED_HEARTBEAT = float(os.getenv('FEED__HEARTBEAT', 15))
+
+POSTS = "posts"
+PRODUCTS = "products"
+# Строка catalog_versions - общий для всех воркеров счетчик id событий.
+FEED_COUNTER = "change_feed"
+# Изменения постов в одном уведомлении: размер NOTIFY ограничен 8000 байт.
+NOTIFY_CHUNK = 100
+
+
+async def publish_post_changes(session: AsyncSession, operation: str,
+                               posts: Iterable[Dict[str, Any]]):
+    """
+    Публикация изменений постов в транзакции сессии. Вызывается до
+    коммита: подписчики получат события, только если он прошел.
+
+    Id событий резервируются в счетчике FEED_COUNTER. Блокировка его
+    строки держится до коммита, поэтому id идут без пропусков в порядке
+    коммитов.
+    """
+
+    changes = [{"id": post["id"], "version": post["version"]}
+               for post in posts]
+    if not changes:
+        return
+
+    last_id = await session.scalar(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == FEED_COUNTER)
+        .values(version=CatalogVersion.version + len(changes))
+        .returning(CatalogVersion.version))
+    first_id = last_id - len(changes) + 1
+    for offset, change in enumerate(changes):
+        change["event_id"] = first_id + offset
+
+    for start in range(0, len(changes), NOTIFY_CHUNK):
+        await invalidation_bus.publish(
+            session, POSTS_CHANGED, operation=operation,
+            changes=changes[start:start + NOTIFY_CHUNK])
+
+
+async def feed_position(session: AsyncSession) -> int:
+    """
+    Id последнего закоммиченного события.
+    """
+
+    position = await session.scalar(
+        select(CatalogVersion.version).where(
+            CatalogVersion.name == FEED_COUNTER))
+    return position or 0
+
+
+class Subscriber:
+    __slots__ = ("topic", "after", "queue", "dropped")
+
+    def __init__(self, topic: str, after: int, queue_size: int):
+        self.topic = topic
+        # События с id не больше after клиент уже получил.
+        self.after = after
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class ChangeFeed:
+    """
+    Рассылка изменений постов и продуктов подписчикам воркера.
+
+    События приходят из invalidation_bus, поэтому подписчик видит
+    изменения, сделанные любым воркером. Id события - номер из общего
+    счетчика в БД, одинаковый для всех воркеров и возрастающий в порядке
+    коммитов без пропусков. Последние события хранятся в кольцевом
+    буфере, и клиент продолжает с переданного Last-Event-ID на любом
+    воркере. Если продолжить нельзя (событие вытеснено из буфера или
+    потеряно при переподключении канала), клиент получает reset и
+    перечитывает данные. У каждого подписчика ограниченная очередь:
+    отстающий подписчик отключается, а не копит события в памяти.
+    """
+
+    def __init__(self, history: int = FEED_HISTORY,
+                 queue_size: int = FEED_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history: deque = deque()
+        self.history = history
+        # Все события с id больше floor есть в буфере; None - неизвестно
+        # (воркер еще не получил событий или пропустил часть).
+        self._floor: int | None = None
+        self._last = 0
+        self._subscribers: set[Subscriber] = set()
+        self.published = 0
+        self.dropped = 0
+        self.resets = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._floor is not None
+
+    @property
+    def last_event_id(self) -> str | None:
+        return str(self._last) if self.ready else None
+
+    def sync(self, position: int):
+        """
+        Точка отсчета по счетчику в БД для воркера без событий. Вызывается,
+        когда канал подключен: все события после position до него дойдут.
+        """
+
+        if self._floor is None:
+            self._floor = position
+            self._last = max(self._last, position)
+
+    def _resume_from(self, event_id: str | None) -> int | None:
+        """
+        Id, с которого можно продолжить, или None.
+        """
+
+        if not event_id or not event_id.isdigit() or self._floor is None:
+            return None
+        event_id = int(event_id)
+        if event_id < self._floor:
+            return None
+        return event_id
+
+    def subscribe(self, topic: str,
+                  last_event_id: str | None) -> tuple[Subscriber, list]:
+        """
+        Подписка на события темы. Возвращает подписчика и пропущенные
+        события после last_event_id (или reset, если продолжить нельзя).
+        """
+
+        after = self._resume_from(last_event_id)
+        subscriber = Subscriber(topic, self._last if after is None else after,
+                                self.queue_size)
+        self._subscribers.add(subscriber)
+
+        if last_event_id is None:
+            return subscriber, []
+        if after is None:
+            return subscriber, [self._reset_event()]
+        return subscriber, [event for event in self._history
+                            if event["seq"] > after and event["topic"] == topic]
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def _reset_event(self) -> dict:
+        return {"id": self.last_event_id, "event": "reset", "data": {}}
+
+    def _drop(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        self.dropped += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    def broadcast(self, topic: str, seq: int, data: dict):
+        if seq <= self._last:
+            return
+        if self._floor is not None and seq > self._last + 1:
+            # Пропуск в номерах: часть событий не дошла.
+            self.reset()
+        if self._floor is None:
+            self._floor = seq - 1
+
+        self._last = seq
+        event = {"id": str(seq), "seq": seq, "topic": topic,
+                 "event": topic, "data": data}
+        self._history.append(event)
+        if len(self._history) > self.history:
+            self._floor = self._history.popleft()["seq"]
+        self.published += 1
+
+        for subscriber in list(self._subscribers):
+            if subscriber.topic != topic or seq <= subscriber.after:
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def reset(self):
+        """
+        Часть событий могла быть потеряна: буфер очищается, точка отсчета
+        неизвестна до следующего события, текущие подписчики получают
+        reset.
+        """
+
+        self._history.clear()
+        self._floor = None
+        self.resets += 1
+        event = self._reset_event()
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    async def handle_event(self, event: dict):
+        if event["event"] == POSTS_CHANGED:
+            for change in event["changes"]:
+                self.broadcast(POSTS, change["event_id"],
+                               {"id": change["id"],
+                                "operation": event["operation"],
+                                "version": change["version"]})
+        elif event["event"] == CATALOG_CHANGED:
+            self.broadcast(PRODUCTS, event["event_id"],
+                           {"operation": "update",
+                            "version": event["version"]})
+        elif event["event"] == RESYNC:
+            self.reset()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "resets": self.resets,
+            "history": len(self._history),
+            "last_event_id": self._last,
+        }
+
+
+change_feed = ChangeFeed()
+
+
+def format_event(event: dict) -> str:
+    data = json.dumps(event["data"], ensure_ascii=False)
+    event_id = f"id: {event['id']}\n" if event["id"] is not None else ""
+    return f"{event_id}event: {event['event']}\ndata: {data}\n\n"
+
+
+def token_active(claims: dict) -> bool:
+    """
+    Токен не истек и пользователь не деактивирован после его выдачи.
+    Смена роли и RESYNC поток не закрывают: права проверены при
+    подключении.
+    """
+
+    if claims.get("exp") and claims["exp"] <= time.time():
+        return False
+    return not revoked_users.is_deactivated(claims.get("sub"),
+                                            claims.get("iat", 0))
+
+
+async def iter_changes(topic: str, last_event_id: str | None,
+                       claims: dict) -> AsyncIterator[str]:
+    """
+    Поток Server-Sent Events. Завершается, когда подписчик отключен за
+    отставание, токен истек или пользователь деактивирован; клиент
+    переподключается с Last-Event-ID.
+    """
+
+    subscriber, backlog = change_feed.subscribe(topic, last_event_id)
+    try:
+        if last_event_id is None and change_feed.ready:
+            # Точка отсчета для первого переподключения.
+            yield f"id: {change_feed.last_event_id}\n\n"
+        for event in backlog:
+            yield format_event(event)
+
+        while token_active(claims):
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(),
+                                               FEED_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            yield format_event(event)
+    finally:
+        change_feed.unsubscribe(subscriber)
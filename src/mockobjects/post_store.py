@@ -0,0 +1,190 @@
+import os
+from typing import Any, Dict
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import Post
+
+POSTS_BATCH_MAX = int(os.getenv('POSTS__BATCH_MAX', 1000))
+POST_COLUMNS = (Post.id, Post.title, Post.content, Post.author, Post.version)
+
+
+def parse_if_match(if_match: str | None) -> list[int] | None:
+    """
+    Версии из заголовка If-Match (ETag вида "3"). None - условия нет:
+    заголовок не передан или равен "*".
+    """
+
+    if not if_match:
+        return None
+    versions = []
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return None
+        try:
+            versions.append(int(candidate.strip('"')))
+        except ValueError:
+            continue
+    return versions
+
+
+async def raise_not_modified(session: AsyncSession, post_id: int):
+    """
+    Причина, по которой изменение не затронуло строку: поста нет (404)
+    или его версия не совпала с If-Match (412).
+    """
+
+    version = await session.scalar(
+        select(Post.version).where(Post.id == post_id))
+    if version is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Пост с ID {post_id} не найден"
+        )
+    raise HTTPException(
+        status_code=412,
+        detail=f"Пост с ID {post_id} изменен, текущая версия {version}"
+    )
+
+
+async def update_post(session: AsyncSession, post_id: int,
+                      changes: Dict[str, Any],
+                      if_match: str | None = None) -> Dict[str, Any]:
+    """
+    Изменение поста одним UPDATE ... RETURNING с увеличением версии.
+    """
+
+    stmt = update(Post).where(Post.id == post_id).values(
+        **changes, version=Post.version + 1)
+    versions = parse_if_match(if_match)
+    if versions is not None:
+        stmt = stmt.where(Post.version.in_(versions))
+
+    result = await session.execute(
+        stmt.returning(*POST_COLUMNS).execution_options(
+            synchronize_session=False))
+    row = result.mappings().first()
+    if row is None:
+        await raise_not_modified(session, post_id)
+    return dict(row)
+
+
+async def delete_post(session: AsyncSession, post_id: int,
+                      if_match: str | None = None) -> Dict[str, Any]:
+    """
+    Удаление поста одним DELETE ... RETURNING.
+    """
+
+    stmt = delete(Post).where(Post.id == post_id)
+    versions = parse_if_match(if_match)
+    if versions is not None:
+        stmt = stmt.where(Post.version.in_(versions))
+
+    result = await session.execute(
+        stmt.returning(*POST_COLUMNS).execution_options(
+            synchronize_session=False))
+    row = result.mappings().first()
+    if row is None:
+        await raise_not_modified(session, post_id)
+    return dict(row)
+
+
+# Пакетные изменения: массивы разворачиваются в строки, условие на версию
+# проверяется для каждой строки отдельно (NULL - без условия).
+DELETE_POSTS_STATEMENT = text("""
+    DELETE FROM posts
+    USING unnest(CAST(:ids AS INTEGER[]), CAST(:versions AS INTEGER[]))
+        AS v(id, version)
+    WHERE posts.id = v.id
+      AND (v.version IS NULL OR posts.version = v.version)
+    RETURNING posts.id, posts.title, posts.content, posts.author,
+              posts.version
+""")
+
+UPDATE_POSTS_STATEMENT = text("""
+    UPDATE posts
+    SET title = v.title, content = v.content, author = v.author,
+        version = posts.version + 1
+    FROM unnest(CAST(:ids AS INTEGER[]), CAST(:versions AS INTEGER[]),
+                CAST(:titles AS VARCHAR[]), CAST(:contents AS TEXT[]),
+                CAST(:authors AS VARCHAR[]))
+        AS v(id, version, title, content, author)
+    WHERE posts.id = v.id
+      AND (v.version IS NULL OR posts.version = v.version)
+    RETURNING posts.id, posts.title, posts.content, posts.author,
+              posts.version
+""")
+
+
+def check_batch(ids: list[int]):
+    if len(ids) > POSTS_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Не больше {POSTS_BATCH_MAX} постов за запрос")
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400,
+                            detail="ID постов повторяются")
+
+
+async def batch_results(session: AsyncSession, ids: list[int],
+                        rows) -> list[Dict[str, Any]]:
+    """
+    Результат по каждому посту в порядке запроса: ok, not_found или
+    conflict (версия не совпала). Текущие версии незатронутых постов
+    читаются одним запросом.
+    """
+
+    changed = {row["id"]: dict(row) for row in rows}
+    missing = [post_id for post_id in ids if post_id not in changed]
+    current = {}
+    if missing:
+        current = dict((await session.execute(
+            select(Post.id, Post.version).where(Post.id.in_(missing)))).all())
+
+    results = []
+    for post_id in ids:
+        if post_id in changed:
+            results.append({"id": post_id, "status": "ok",
+                            "post": changed[post_id]})
+        elif post_id in current:
+            results.append({"id": post_id, "status": "conflict",
+                            "version": current[post_id]})
+        else:
+            results.append({"id": post_id, "status": "not_found"})
+    return results
+
+
+async def delete_posts(session: AsyncSession,
+                       items: list) -> list[Dict[str, Any]]:
+    """
+    Удаление пачки постов одним DELETE ... RETURNING.
+    """
+
+    ids = [item.id for item in items]
+    check_batch(ids)
+    result = await session.execute(DELETE_POSTS_STATEMENT, {
+        "ids": ids,
+        "versions": [item.version for item in items],
+    })
+    return await batch_results(session, ids, result.mappings().all())
+
+
+async def update_posts(session: AsyncSession,
+                       items: list) -> list[Dict[str, Any]]:
+    """
+    Изменение пачки постов одним UPDATE ... RETURNING.
+    """
+
+    ids = [item.id for item in items]
+    check_batch(ids)
+    result = await session.execute(UPDATE_POSTS_STATEMENT, {
+        "ids": ids,
+        "versions": [item.version for item in items],
+        "titles": [item.title for item in items],
+        "contents": [item.content for item in items],
+        "authors": [item.author for item in items],
+    })
+    return await batch_results(session, ids, result.mappings().all())
@@ -0,0 +1,60 @@
+import os
+import re
+
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import Product, Post, PRODUCT_SEARCH_VECTOR, \
+    POST_SEARCH_VECTOR
+
+SEARCH_LIMIT = int(os.getenv('SEARCH__LIMIT', 20))
+SEARCH_MAX_LIMIT = int(os.getenv('SEARCH__MAX_LIMIT', 100))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def prefix_query(text: str) -> str | None:
+    """
+    Запрос tsquery: все слова обязательны, последнее - по префиксу.
+    """
+
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    tokens[-1] += ":*"
+    return " & ".join(tokens)
+
+
+async def search(session: AsyncSession, model, vector: str, text: str,
+                 limit: int) -> list[dict]:
+    """
+    Полнотекстовый поиск по GIN-индексу выражения vector, результаты по
+    убыванию ts_rank.
+    """
+
+    query = prefix_query(text)
+    if query is None:
+        return []
+
+    document = literal_column(vector)
+    tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), query)
+    stmt = select(*model.__table__.columns).where(
+        document.op("@@")(tsquery)
+    ).order_by(func.ts_rank(document, tsquery).desc(), model.id).limit(limit)
+
+    rows = await session.execute(stmt)
+    return [dict(row) for row in rows.mappings()]
+
+
+async def search_products(session: AsyncSession, text: str,
+                          limit: int) -> list[dict]:
+    return await search(session, Product, PRODUCT_SEARCH_VECTOR, text, limit)
+
+
+async def search_posts(session: AsyncSession, text: str,
+                       limit: int) -> list[dict]:
+    return await search(session, Post, POST_SEARCH_VECTOR, text, limit)
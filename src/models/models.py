@@ -2,7 +2,7 @@ import uuid
 from typing import  List
 
 from sqlalchemy import UUID, ForeignKey, String, MetaData, func, Boolean, \
-    DateTime, Table, Column
+    DateTime, Table, Column, Index, Integer, BigInteger, Float, Text, text
 
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -33,10 +33,19 @@ class User(Base):
 
     is_active: Mapped[bool] = mapped_column(
         Boolean, default=False)
+
+    last_login_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
     role: Mapped["Role"] = relationship(back_populates="users")
 
     role_id: Mapped[UUID] = mapped_column(ForeignKey("roles.id"))
 
+    # Индексы для постраничного просмотра по (registered_at, id).
+    __table_args__ = (
+        Index("ix_users_registered_at_id", "registered_at", "id"),
+        Index("ix_users_role_id_registered_at_id",
+              "role_id", "registered_at", "id"),
+    )
+
 
 role_permission = Table(
     "role_permission",
@@ -71,3 +80,69 @@ class Permission(Base):
 
     roles: Mapped[List[Role]] = relationship(secondary=role_permission,
                                              back_populates="permissions")
+
+
+class SeedState(Base):
+    __tablename__ = "seed_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    checksum: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime, default=func.current_timestamp(),
+        onupdate=func.current_timestamp())
+
+
+# Выражения полнотекстового поиска. Запросы используют те же выражения,
+# что и GIN-индексы, иначе индекс не применяется.
+PRODUCT_SEARCH_VECTOR = ("(setweight(to_tsvector('simple', name), 'A') || "
+                         "setweight(to_tsvector('simple', category), 'B'))")
+POST_SEARCH_VECTOR = ("(setweight(to_tsvector('simple', title), 'A') || "
+                      "setweight(to_tsvector('simple', content), 'B'))")
+
+
+class Product(Base):
+    __tablename__ = "products"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    category: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    # Индексы для фильтров и постраничного просмотра по (price, id) и id.
+    __table_args__ = (
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_price_id", "category", "price", "id"),
+        Index("ix_products_category_id", "category", "id"),
+        Index("ix_products_search", text(PRODUCT_SEARCH_VECTOR),
+              postgresql_using="gin"),
+    )
+
+
+class Post(Base):
+    __tablename__ = "posts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    author: Mapped[str] = mapped_column(String(100), nullable=False,
+                                        index=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1,
+                                         server_default="1")
+
+    __table_args__ = (
+        Index("ix_posts_search", text(POST_SEARCH_VECTOR),
+              postgresql_using="gin"),
+    )
+
+
+class CatalogVersion(Base):
+    """
+    Счетчик изменений таблицы: увеличивается триггером на каждую
+    команду INSERT/UPDATE/DELETE/TRUNCATE.
+    """
+
+    __tablename__ = "catalog_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False,
+                                         default=0)